@@ -0,0 +1,500 @@
+import pandas as pd
+
+# Channels measured on number of policies; everything else is premium
+NOP_CHANNELS = ["Association", "Renewal", "Affiliate Renewal"]
+
+DEAL_STATUSES = ["achieved", "partial", "slipped", "open"]
+
+# Follow-up answers in order; stage 0 means not recorded
+FOLLOWUP_STAGES = ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"]
+
+
+def nop_commit_column(df):
+    # The commitment sheet has used both headers for the NOP count
+    for col in ["nop", "commitment_nop"]:
+        if col in df.columns:
+            return col
+    return None
+
+
+def numeric(df, col):
+    if col is None or col not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+
+def metric_kinds(df):
+    # NOP / PREMIUM per row: the employee's resolved metric when assigned,
+    # otherwise the channel written on the row
+    if "metric" in df.columns:
+        return df["metric"]
+    is_nop = df["channel"].isin(NOP_CHANNELS) if "channel" in df.columns else pd.Series(False, index=df.index)
+    return pd.Series("PREMIUM", index=df.index).where(~is_nop, "NOP")
+
+
+def commit_values(df):
+    # Commitment amount in each row's own metric (NOP or premium)
+    if "commit_value" in df.columns:
+        return df["commit_value"]
+    is_nop = metric_kinds(df) == "NOP"
+    return numeric(df, nop_commit_column(df)).where(is_nop, numeric(df, "expected_premium"))
+
+
+def achieved_values(df):
+    if "ach_value" in df.columns:
+        return df["ach_value"]
+    is_nop = metric_kinds(df) == "NOP"
+    return numeric(df, "actual_nop").where(is_nop, numeric(df, "actual_premium"))
+
+
+def followup_stage(df):
+    # "1st" … "7th or more" as an int8 ordinal 1-7 (0 = blank / unknown)
+    if "followup_stage" in df.columns:
+        return df["followup_stage"]
+    if "followups" not in df.columns:
+        return pd.Series(0, index=df.index, dtype="int8")
+    text = df["followups"].fillna("").astype(str).str.strip()
+    codes = pd.Categorical(text, categories=FOLLOWUP_STAGES, ordered=True).codes + 1
+    return pd.Series(codes, index=df.index).astype("int8")
+
+
+# ================= CHANNEL / METRIC LOOKUP =================
+def employee_metrics(users):
+    # empcode -> NOP / PREMIUM from the employee's channel in user_master
+    if users.empty or "empcode" not in users.columns or "channel" not in users.columns:
+        return pd.Series(dtype="object")
+    codes = users["empcode"].astype(str).str.strip()
+    metric = pd.Series("PREMIUM", index=users.index).where(~users["channel"].isin(NOP_CHANNELS), "NOP")
+    return pd.Series(metric.values, index=codes.values).groupby(level=0).first()
+
+
+def team_profiles(users):
+    # team -> dominant channel and the metrics its members are measured on
+    if users.empty or "team" not in users.columns or "channel" not in users.columns:
+        return pd.DataFrame(columns=["channel", "metrics"])
+    counts = users.groupby(["team", "channel"]).size().reset_index(name="n")
+    dominant = counts.sort_values(["team", "n"], ascending=[True, False], kind="stable").drop_duplicates("team")
+    profile = dominant.set_index("team")[["channel"]]
+    kinds = users.assign(metric=metric_kinds(users[["channel"]]))
+    profile["metrics"] = kinds.groupby("team")["metric"].agg(lambda m: sorted(m.unique()))
+    return profile
+
+
+def assign_metrics(df, emp_metric):
+    # Stamp each row with its employee's metric and the value in that metric
+    if df.empty or "empcode" not in df.columns:
+        return df.assign(metric=pd.Series(dtype="object"), commit_value=0.0, ach_value=0.0)
+    fallback = metric_kinds(df.drop(columns=["metric"], errors="ignore"))
+    metric = df["empcode"].astype(str).str.strip().map(emp_metric).fillna(fallback)
+    is_nop = metric == "NOP"
+    return df.assign(
+        metric=metric,
+        commit_value=numeric(df, nop_commit_column(df)).where(is_nop, numeric(df, "expected_premium")),
+        ach_value=numeric(df, "actual_nop").where(is_nop, numeric(df, "actual_premium")),
+    )
+
+
+def has_deal(df):
+    if "deal_id" not in df.columns:
+        return pd.Series(False, index=df.index)
+    deal_id = df["deal_id"].fillna("").astype(str).str.strip()
+    return (deal_id != "") & (deal_id != "nan")
+
+
+def deal_rows(df):
+    # Rows that carry a deal_id, with normalized join keys
+    if df.empty or "deal_id" not in df.columns or "empcode" not in df.columns:
+        return df.iloc[0:0]
+    out = df.assign(
+        empcode=df["empcode"].astype(str).str.strip(),
+        deal_id=df["deal_id"].fillna("").astype(str).str.strip(),
+    )
+    return out[has_deal(out)]
+
+
+# ================= DEAL RECONCILIATION =================
+def reconcile(commitments, achievements, today):
+    # One row per committed deal (empcode + deal_id) with its status
+    # (achieved / partial / slipped / open) and commitment-to-closure lag
+    columns = ["empcode", "deal_id", "empname", "team", "channel", "client_name",
+               "first_committed", "last_committed", "closure_date", "committed",
+               "achieved", "first_achieved", "status", "lag_days", "metric", "followup_stage"]
+
+    c = deal_rows(commitments)
+    if c.empty:
+        return pd.DataFrame(columns=columns)
+
+    c = c.assign(committed=commit_values(c), metric=metric_kinds(c), followup_stage=followup_stage(c))
+    for col in ["empname", "team", "channel", "client_name"]:
+        if col not in c.columns:
+            c[col] = ""
+    if "closure_date" not in c.columns:
+        c["closure_date"] = pd.NaT
+
+    # Follow-up submissions repeat the deal; the latest one carries the current
+    # expected value and closure date
+    c = c.sort_values("date", kind="stable")
+    keys = ["empcode", "deal_id"]
+    deals = c.groupby(keys, sort=False).agg(
+        empname=("empname", "last"),
+        team=("team", "last"),
+        channel=("channel", "last"),
+        client_name=("client_name", "last"),
+        first_committed=("date", "min"),
+        last_committed=("date", "max"),
+        closure_date=("closure_date", "last"),
+        committed=("committed", "last"),
+        metric=("metric", "last"),
+        followup_stage=("followup_stage", "last"),
+    ).reset_index()
+
+    a = deal_rows(achievements)
+    if a.empty:
+        done = pd.DataFrame(columns=keys + ["achieved", "first_achieved"])
+    else:
+        a = a.assign(achieved=achieved_values(a))
+        done = a.groupby(keys, sort=False).agg(
+            achieved=("achieved", "sum"),
+            first_achieved=("date", "min"),
+        ).reset_index()
+
+    out = deals.merge(done, on=keys, how="left")
+    out["achieved"] = pd.to_numeric(out["achieved"], errors="coerce").fillna(0)
+    out["first_achieved"] = pd.to_datetime(out["first_achieved"], errors="coerce")
+
+    today = pd.Timestamp(today)
+    hit = out["achieved"] > 0
+    full = hit & (out["achieved"] >= out["committed"])
+    overdue = out["closure_date"].notna() & (out["closure_date"] < today)
+
+    out["status"] = "open"
+    out.loc[overdue & ~hit, "status"] = "slipped"
+    out.loc[hit, "status"] = "partial"
+    out.loc[full, "status"] = "achieved"
+    out["lag_days"] = (out["first_achieved"] - out["first_committed"]).dt.days
+
+    return out[columns]
+
+
+def status_counts(rec):
+    counts = rec["status"].value_counts() if not rec.empty else pd.Series(dtype="int64")
+    return {s: int(counts.get(s, 0)) for s in DEAL_STATUSES}
+
+
+# ================= TIME SERIES =================
+# scope -> column that identifies it in the fact rows
+SCOPE_COLUMNS = {"all": "all", "channel": "channel", "team": "team", "user": "empcode"}
+
+MEASURES = ["commitment", "achievement", "meetings"]
+
+WINDOWS = {"daily": 1, "7d": 7, "30d": 30}
+
+
+def fact_rows(commitments, achievements):
+    # Commitment and achievement rows stacked into one long frame of measures
+    frames = []
+    for df, kind in [(commitments, "commitment"), (achievements, "achievement")]:
+        if df.empty or "date" not in df.columns:
+            continue
+        df = df[df["date"].notna()]
+        facts = pd.DataFrame({
+            "date": df["date"].dt.normalize(),
+            "metric": metric_kinds(df),
+            "all": "All",
+            "channel": df["channel"].astype(str) if "channel" in df.columns else "",
+            "team": df["team"].astype(str) if "team" in df.columns else "",
+            "empcode": df["empcode"].astype(str).str.strip() if "empcode" in df.columns else "",
+            "commitment": commit_values(df) if kind == "commitment" else 0.0,
+            "achievement": achieved_values(df) if kind == "achievement" else 0.0,
+            "meetings": numeric(df, "meeting_count") if kind == "commitment" else 0.0,
+        })
+        frames.append(facts)
+    if not frames:
+        return pd.DataFrame(columns=["date", "metric"] + list(SCOPE_COLUMNS.values()) + MEASURES)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_timeseries(commitments, achievements, today):
+    # For every scope: a calendar-indexed wide frame per window, with columns
+    # (measure, scope value, metric). Built once; scope switches are column picks.
+    facts = fact_rows(commitments, achievements)
+    if facts.empty:
+        return {}
+
+    calendar = pd.date_range(facts["date"].min(), max(facts["date"].max(), pd.Timestamp(today)), freq="D")
+    series = {}
+    for scope, col in SCOPE_COLUMNS.items():
+        daily = facts.groupby([col, "metric", "date"])[MEASURES].sum()
+        wide = daily.unstack([col, "metric"], fill_value=0).reindex(calendar, fill_value=0)
+        series[scope] = {
+            name: wide if days == 1 else wide.rolling(days, min_periods=1).sum()
+            for name, days in WINDOWS.items()
+        }
+    return series
+
+
+def scope_series(series, scope, value, window, start=None, end=None):
+    # {metric: frame[commitment, achievement, achievement %, meetings]} for one scope value
+    if scope not in series:
+        return {}
+    frame = series[scope][window]
+    if value not in frame.columns.get_level_values(1):
+        return {}
+    frame = frame.xs(value, axis=1, level=1)
+    if start is not None or end is not None:
+        frame = frame.loc[start:end]
+
+    out = {}
+    for metric in frame.columns.get_level_values(1).unique():
+        part = frame.xs(metric, axis=1, level=1)[MEASURES].copy()
+        committed = part["commitment"].where(part["commitment"] != 0)
+        part["achievement %"] = (part["achievement"] / committed * 100).round(1).fillna(0)
+        out[metric] = part
+    return out
+
+
+# ================= PERIOD COMPARISON =================
+def build_prefix_sums(series):
+    # Running totals of the daily frames; any date range total is two row lookups
+    return {scope: frames["daily"].cumsum() for scope, frames in series.items()}
+
+
+def prefix_at(prefix, day):
+    # Cumulative row up to and including day (calendar is contiguous, so O(1))
+    pos = (pd.Timestamp(day) - prefix.index[0]).days
+    if pos < 0:
+        return pd.Series(0.0, index=prefix.columns)
+    return prefix.iloc[min(pos, len(prefix) - 1)]
+
+
+def range_total(prefix, start, end):
+    return prefix_at(prefix, end) - prefix_at(prefix, pd.Timestamp(start) - pd.Timedelta(days=1))
+
+
+def same_day_cut(as_of, months_back):
+    # (start, end) of an earlier month cut at the same day of month
+    as_of = pd.Timestamp(as_of)
+    start = (as_of.replace(day=1) - pd.DateOffset(months=months_back))
+    month_end = start + pd.offsets.MonthEnd(0)
+    return start, min(start + pd.Timedelta(days=as_of.day - 1), month_end)
+
+
+def period_comparison(prefix_sums, scope, as_of):
+    # MTD to as_of vs the same cut of last month and of the same month last
+    # year, for every value of the scope at once
+    if scope not in prefix_sums:
+        return pd.DataFrame()
+    prefix = prefix_sums[scope]
+    as_of = pd.Timestamp(as_of)
+
+    periods = {
+        "mtd": (as_of.replace(day=1), as_of),
+        "last_month": same_day_cut(as_of, 1),
+        "last_year": same_day_cut(as_of, 12),
+    }
+    totals = pd.DataFrame({name: range_total(prefix, *span) for name, span in periods.items()})
+    table = totals.unstack(level=0)  # rows (scope value, metric), columns (period, measure)
+    table.columns = [f"{period}_{measure}" for period, measure in table.columns]
+
+    for period in ["last_month", "last_year"]:
+        base = table[f"{period}_achievement"].where(table[f"{period}_achievement"] != 0)
+        change = (table["mtd_achievement"] - table[f"{period}_achievement"]) / base * 100
+        table[f"vs_{period}_%"] = change.round(1)
+
+    table.index.names = [scope, "metric"]
+    return table.reset_index()
+
+
+# ================= ORG HIERARCHY =================
+def build_org_tree(users, lead_team_map):
+    # Flat edges of management -> lead -> team -> employee
+    if users.empty or "empcode" not in users.columns:
+        return pd.DataFrame(columns=["empcode", "empname", "team", "channel", "lead_empcode", "lead_name"])
+
+    emp = pd.DataFrame({
+        "empcode": users["empcode"].astype(str).str.strip(),
+        "empname": users["empname"].astype(str) if "empname" in users.columns else "",
+        "team": users["team"].astype(str) if "team" in users.columns else "",
+        "channel": users["channel"].astype(str) if "channel" in users.columns else "",
+    }).drop_duplicates("empcode")
+
+    if lead_team_map.empty or "lead_empcode" not in lead_team_map.columns:
+        leads = pd.DataFrame(columns=["team", "lead_empcode"])
+    else:
+        leads = pd.DataFrame({
+            "team": lead_team_map["team"].astype(str),
+            "lead_empcode": lead_team_map["lead_empcode"].astype(str).str.strip(),
+        }).drop_duplicates()
+
+    names = emp.set_index("empcode")["empname"]
+    leads["lead_name"] = leads["lead_empcode"].map(names).fillna(leads["lead_empcode"])
+
+    org = emp.merge(leads, on="team", how="left")
+    org["lead_empcode"] = org["lead_empcode"].fillna("")
+    org["lead_name"] = org["lead_name"].fillna("Unassigned")
+    return org
+
+
+def employee_totals(prefix_sums, start, end):
+    # Period totals per (empcode, metric) straight from the prefix sums
+    if "user" not in prefix_sums:
+        return pd.DataFrame(columns=MEASURES)
+    totals = range_total(prefix_sums["user"], start, end)
+    return totals.unstack(level=0)
+
+
+def with_achievement_pct(df):
+    committed = df["commitment"].where(df["commitment"] != 0)
+    df["achievement %"] = (df["achievement"] / committed * 100).round(1).fillna(0)
+    return df
+
+
+def org_rollup(org, emp_totals):
+    # Aggregate bottom-up in one pass: employee -> team -> lead -> channel -> management
+    if emp_totals.empty:
+        empty = pd.DataFrame()
+        return {"employee": empty, "team": empty, "lead": empty, "channel": empty, "management": empty}
+
+    totals = emp_totals.reset_index()
+    totals.columns = ["empcode", "metric"] + list(totals.columns[2:])
+
+    staff = org.drop_duplicates("empcode")[["empcode", "empname", "team", "channel"]]
+    employee = staff.merge(totals, on="empcode", how="inner")
+
+    team = employee.groupby(["team", "metric"], as_index=False)[MEASURES].sum()
+
+    # Each team sits under its members' dominant channel, so every level
+    # still sums to the one above it
+    counts = staff.groupby(["team", "channel"]).size().reset_index(name="n")
+    home = counts.sort_values(["team", "n"], ascending=[True, False], kind="stable").drop_duplicates("team")
+    team["channel"] = team["team"].map(home.set_index("team")["channel"])
+
+    # A team can report to more than one lead; each lead sees the whole team
+    lead_teams = org[["lead_empcode", "lead_name", "team"]].drop_duplicates()
+    lead = lead_teams.merge(team, on="team").groupby(
+        ["channel", "lead_empcode", "lead_name", "metric"], as_index=False
+    )[MEASURES].sum()
+
+    channel = team.groupby(["channel", "metric"], as_index=False)[MEASURES].sum()
+    management = team.groupby("metric", as_index=False)[MEASURES].sum()
+
+    return {
+        "employee": with_achievement_pct(employee),
+        "team": with_achievement_pct(team.merge(lead_teams, on="team", how="left")),
+        "lead": with_achievement_pct(lead),
+        "channel": with_achievement_pct(channel),
+        "management": with_achievement_pct(management),
+    }
+
+
+# ================= FOLLOW-UP PIPELINE =================
+CLOSURE_BUCKETS = ["overdue", "this week", "this month", "later", "no date"]
+
+# Buckets expected to close before month end; overdue deals can still land
+CLOSING_THIS_MONTH = ["overdue", "this week", "this month"]
+
+
+def closure_buckets(closure_date, today):
+    today = pd.Timestamp(today).normalize()
+    week_end = today + pd.Timedelta(days=6 - today.weekday())
+    month_end = today + pd.offsets.MonthEnd(0)
+    bucket = pd.Series("later", index=closure_date.index)
+    bucket = bucket.mask(closure_date <= month_end, "this month")
+    bucket = bucket.mask(closure_date <= week_end, "this week")
+    bucket = bucket.mask(closure_date < today, "overdue")
+    bucket = bucket.mask(closure_date.isna(), "no date")
+    return pd.Categorical(bucket, categories=CLOSURE_BUCKETS, ordered=True)
+
+
+def stage_conversion(rec):
+    # Share of committed value realized by deals that have resolved
+    # (achieved, partial or slipped), per follow-up stage. Stages without
+    # history fall back to the overall rate.
+    stages = pd.Series(0.0, index=range(len(FOLLOWUP_STAGES) + 1))
+    resolved = rec[(rec["status"] != "open") & (rec["committed"] > 0)]
+    if resolved.empty:
+        return stages
+    realized = resolved["achieved"].clip(upper=resolved["committed"])
+    by_stage = realized.groupby(resolved["followup_stage"]).sum() / resolved.groupby("followup_stage")["committed"].sum()
+    overall = realized.sum() / resolved["committed"].sum()
+    return by_stage.reindex(stages.index).fillna(overall)
+
+
+def dealless_commitments(commitments):
+    # Commitment rows with a closure date but no deal ID (Affiliate, Corporate,
+    # Affiliate Renewal), shaped like reconcile() rows. Nothing joins them to
+    # an achievement, so each stays open at its full committed value.
+    if commitments.empty or "closure_date" not in commitments.columns or "empcode" not in commitments.columns:
+        return pd.DataFrame()
+    c = commitments[~has_deal(commitments) & commitments["closure_date"].notna()]
+    if c.empty:
+        return pd.DataFrame()
+    c = c.assign(
+        empcode=c["empcode"].astype(str).str.strip(), deal_id="", committed=commit_values(c),
+        achieved=0.0, metric=metric_kinds(c), followup_stage=followup_stage(c), status="open",
+    )
+    for col in ["empname", "team", "channel", "client_name"]:
+        if col not in c.columns:
+            c[col] = ""
+    return c
+
+
+def build_pipeline(commitments, rec, conversion, today):
+    # One row per open commitment: each reconciled deal, net of what was
+    # achieved on it, plus every dated commitment without a deal ID. Carries
+    # the closure bucket, stage, value still to come and its
+    # conversion-weighted expectation for this month.
+    columns = ["empcode", "empname", "team", "channel", "all", "metric", "deal_id", "client_name",
+               "closure_date", "followup_stage", "bucket", "remaining", "expected"]
+    parts = [part for part in [rec, dealless_commitments(commitments)] if not part.empty]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    open_items = pd.concat(parts, ignore_index=True)
+
+    remaining = (open_items["committed"] - open_items["achieved"]).clip(lower=0)
+    pipe = open_items[(open_items["status"] != "achieved") & (remaining > 0)].assign(remaining=remaining, all="All")
+    pipe["bucket"] = closure_buckets(pipe["closure_date"], today)
+    rate = pipe["followup_stage"].astype("int64").map(conversion).fillna(0)
+    pipe["expected"] = (pipe["remaining"] * rate).where(pipe["bucket"].isin(CLOSING_THIS_MONTH), 0.0)
+    return pipe[columns]
+
+
+def bucket_summary(pipeline):
+    # Deals and open value per (metric, closure bucket), empty buckets kept
+    return pipeline.groupby(["metric", "bucket"], observed=False)["remaining"].agg(deals="count", value="sum")
+
+
+def stage_funnel(pipeline, conversion):
+    funnel = pipeline.groupby(["metric", "followup_stage"])["remaining"].agg(deals="count", value="sum")
+    funnel = funnel.reset_index()
+    funnel["stage"] = funnel["followup_stage"].map(
+        lambda s: FOLLOWUP_STAGES[s - 1] if s > 0 else "Not recorded"
+    )
+    funnel["conversion %"] = (funnel["followup_stage"].astype("int64").map(conversion) * 100).round(1)
+    return funnel
+
+
+def month_end_projection(pipeline, prefix_sums, scope, today):
+    # MTD achievement + expected pipeline closing this month, per scope value
+    col = SCOPE_COLUMNS[scope]
+    columns = [scope, "metric", "mtd_commitment", "mtd_achievement", "pipeline", "expected",
+               "projected", "projected_%"]
+    if scope not in prefix_sums:
+        return pd.DataFrame(columns=columns)
+
+    today = pd.Timestamp(today)
+    mtd = range_total(prefix_sums[scope], today.replace(day=1), today).unstack(level=0)
+    mtd = mtd[["commitment", "achievement"]].add_prefix("mtd_")
+
+    closing = pipeline[pipeline["bucket"].isin(CLOSING_THIS_MONTH)]
+    ahead = closing.groupby([col, "metric"])[["remaining", "expected"]].sum()
+    ahead.columns = ["pipeline", "expected"]
+    ahead.index.names = mtd.index.names
+
+    table = mtd.join(ahead, how="outer").fillna(0)
+    table["expected"] = table["expected"].round(1)
+    table["projected"] = table["mtd_achievement"] + table["expected"]
+    committed = table["mtd_commitment"].where(table["mtd_commitment"] != 0)
+    table["projected_%"] = (table["projected"] / committed * 100).round(1)
+    table.index.names = [scope, "metric"]
+    return table.reset_index()[columns]
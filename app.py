@@ -10,9 +10,9 @@ st.set_page_config(
 
 from datetime import date, datetime, time as dt_time
 from zoneinfo import ZoneInfo
-import pandas as pd
-from sheets import get_client, read_sheet, append_row
-from gspread.exceptions import APIError
+import io
+import os
+import threading
 import time
 
 
@@ -110,9 +110,74 @@ st.markdown("## 📊 Commitment vs Achievement")
 st.caption("From commitment to measurable achievement")
 
 
+# ================= SESSION =================
+st.session_state.setdefault("verified", False)
+st.session_state.setdefault("pending_writes", [])
+
+# ================= TIME LOGIC =================
+ist = ZoneInfo("Asia/Kolkata")
+now = datetime.now(ist)
+# HH:MM in IST; overridable so load tests can run at any time of day
+cutoff_hour, cutoff_minute = map(int, os.environ.get("COMMITMENT_CUTOFF", "11:30").split(":"))
+cutoff = datetime.combine(
+    date.today(),
+    dt_time(cutoff_hour, cutoff_minute).replace(tzinfo=ist)  # <- use datetime.time here
+)    
+form_allowed = now < cutoff
+
+# ================= LAYOUT =================
+# ?view=wallboard is the read-only TV display: no login, no entry forms
+wallboard = st.query_params.get("view") == "wallboard"
+left, right = st.columns([1.5, 1])
+
+# ================= LOGIN =================
+if wallboard:
+    emp_code, verify_clicked, login_msg = "", False, st.container()
+else:
+    with left:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        emp_code = st.text_input("Employee Code").strip()
+        verify_clicked = st.button("Verify Employee Code")
+        login_msg = st.container()
+        st.markdown("</div>", unsafe_allow_html=True)
+
+# Fast first paint: nothing below runs until someone verifies
+if not (wallboard or verify_clicked or st.session_state.verified):
+    st.stop()
+
+# ================= DEFERRED IMPORTS =================
+# pandas and the Google client stack load only after someone hits Verify, so
+# the login box above paints without waiting for them.
+import pandas as pd
+from concurrent.futures import TimeoutError as FutureTimeout
+from sheets import (
+    get_client, read_sheet, read_rows, append_row, append_rows, sheet_header, get_shared_cache,
+    SheetsIO, SheetTimeout
+)
+from quality import quality_issues, issue_counts
+from forms import (
+    CHANNEL_SCHEMAS, SHEET_COLUMNS, render_fields, normalize, validate_frame, serialize_rows,
+    grid_column_config, grid_template, submission_keys, dedupe_submissions
+)
+from analytics import (
+    reconcile, status_counts, build_timeseries, scope_series, WINDOWS,
+    build_prefix_sums, period_comparison, build_org_tree, employee_totals, org_rollup,
+    NOP_CHANNELS, employee_metrics, team_profiles, assign_metrics,
+    followup_stage, stage_conversion, build_pipeline, bucket_summary, stage_funnel,
+    month_end_projection, SCOPE_COLUMNS
+)
+from archive import ARCHIVE_DIR, ARCHIVED_SHEETS, archive_stamp, read_archive, merge_archive
+from ingest import (
+    ACHIEVEMENT_COLUMNS, read_chunks, missing_columns, prepare_chunk,
+    achievement_keys, key_index, unseen, achievement_rows
+)
+from wallboard import KpiBoard, WALLBOARD_SCOPES
+
 # ================= CACHED SHEET CONNECTION =================
 @st.cache_resource
 def get_sheet():
+    from gspread.exceptions import APIError
+
     gc = get_client()
     retry = 0
     while retry < 3:
@@ -127,28 +192,62 @@ def get_sheet():
                 raise e
     raise Exception("Exceeded Google Sheets API rate limit. Try again later.")
 
-sh = get_sheet()
+# ================= SHARED CACHE (MULTI-REPLICA) =================
+@st.cache_resource
+def shared_cache():
+    return get_shared_cache()
+
+# With a shared tier the local copy only has to track the shared snapshot
+LOAD_TTL = 60 if shared_cache() else 300
+
+# ================= BACKGROUND SHEETS I/O =================
+@st.cache_resource
+def sheets_io():
+    return SheetsIO()
+
+WRITE_WAIT = 5  # seconds a submit waits before the write carries on in the background
 
 # ================= CACHED DATA LOAD =================
-@st.cache_data(ttl=300)  # cache data for 5 minutes
-def load_sheet(sheet_name):
-    df = read_sheet(sh, sheet_name)
-    df.columns = df.columns.str.lower()
-    if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+def request_sheet(sheet_name):
+    # Starts the read on the I/O pool; collect_sheet() waits for it.
+    # get_sheet() is a Streamlit cache, so it resolves here on the script
+    # thread and the worker only gets the handle.
+    sh = get_sheet()
+    cache = shared_cache()
+    if cache:
+        # Only the replica holding the refresh lock talks to Google
+        fetch = lambda: cache.read(sheet_name, lambda: read_sheet(sh, sheet_name))
+    else:
+        fetch = lambda: read_sheet(sh, sheet_name)
+    return sheets_io().read_async(sheet_name, fetch)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_archive(sheet_name, stamp):
+    # Partitions only change when archive.py runs; stamp tracks their mtimes
+    df = read_archive(ARCHIVE_DIR, sheet_name)
+    df.columns = df.columns.astype(str).str.lower()
     return df
 
-users = load_sheet("user_master")
-commitments = load_sheet("daily_commitments")
-achievements = load_sheet("daily_achievement")
-lead_team_map = load_sheet("lead_team_map")
-
+def collect_sheet(sheet_name, future):
+    # Raises SheetTimeout only when the read is slow and nothing loaded before
+    # Values stay as read; clean_commitment_achievement() parses them after
+    # the quality checks have seen the raw text
+    df = sheets_io().result(sheet_name, future)
+    load_error = df.attrs.get("load_error")
+    df.columns = df.columns.astype(str).str.lower()
+    if sheet_name in ARCHIVED_SHEETS:
+        # Closed months live in the archive; callers see one continuous sheet
+        df = merge_archive(df, load_archive(sheet_name, archive_stamp(ARCHIVE_DIR, sheet_name)))
+    if load_error:
+        df.attrs["load_error"] = load_error
+    return df
 
+def fetch_sheet(sheet_name):
+    return collect_sheet(sheet_name, request_sheet(sheet_name))
 
-users.columns = users.columns.str.lower()
-commitments.columns = commitments.columns.str.lower()
-achievements.columns = achievements.columns.str.lower()
-lead_team_map.columns = lead_team_map.columns.str.lower()
+@st.cache_data(ttl=LOAD_TTL)  # cache data for 5 minutes (1 minute over the shared tier)
+def load_sheet(sheet_name):
+    return fetch_sheet(sheet_name)
 
 # ---------- COLUMN / DATA SAFETY ----------
 def clean_commitment_achievement(df):
@@ -164,7 +263,7 @@ def clean_commitment_achievement(df):
                  "deal_assigned_to","case_type","product_type","meeting_type","client_mobile","followups"]
     for col in text_cols:
         if col in df.columns:
-            df[col] = df[col].astype(str).fillna("")
+            df[col] = df[col].fillna("").astype(str)
 
     # Ensure date columns are proper datetime
     date_cols = ["date","closure_date"]
@@ -174,39 +273,17 @@ def clean_commitment_achievement(df):
     return df
 
 
-commitments = clean_commitment_achievement(commitments)
-achievements = clean_commitment_achievement(achievements)
-users = clean_commitment_achievement(users)
-lead_team_map = clean_commitment_achievement(lead_team_map)
-
-
-
-for df in [commitments, achievements]:
-    if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-
-# ================= SESSION =================
-st.session_state.setdefault("verified", False)
-
-# ================= TIME LOGIC =================
-ist = ZoneInfo("Asia/Kolkata")
-now = datetime.now(ist)
-cutoff = datetime.combine(
-    date.today(),
-    dt_time(11, 30).replace(tzinfo=ist)  # <- use datetime.time here
-)    
-form_allowed = now < cutoff
-
-# ================= LAYOUT =================
-left, right = st.columns([1.5, 1])
-
-# ================= LOGIN =================
-with left:
-    st.markdown('<div class="card">', unsafe_allow_html=True)
-    emp_code = st.text_input("Employee Code").strip()
+try:
+    users = clean_commitment_achievement(load_sheet("user_master"))
+except SheetTimeout:
+    with login_msg:
+        st.warning("⏳ Google Sheets is responding slowly. Please try again in a moment.")
+    st.stop()
 
-    if st.button("Verify Employee Code"):
-        user = users[users["empcode"].astype(str) == emp_code]
+# ================= VERIFY =================
+if verify_clicked:
+    user = users[users["empcode"].astype(str) == emp_code]
+    with login_msg:
         if user.empty:
             st.error("Invalid Employee Code")
         else:
@@ -217,8 +294,339 @@ with left:
             st.session_state.role = user.iloc[0]["role"]
             st.session_state.channel = user.iloc[0]["channel"]
             st.success(f"Welcome {st.session_state.emp_name}")
-    st.markdown("</div>", unsafe_allow_html=True)
 
+if not (wallboard or st.session_state.verified):
+    st.stop()
+
+# ================= READ-YOUR-OWN-WRITE OVERLAY =================
+# Rows appended by this process stay here until the cached sheet catches up,
+# so a submit shows on the dashboard without forcing a full sheet reload.
+OVERLAY_TTL = 600  # seconds, longer than the load_sheet cache
+
+@st.cache_resource
+def get_overlay():
+    return {"lock": threading.Lock(), "rows": [], "keys": {}}
+
+def add_to_overlay(sheet_name, row, columns):
+    overlay = get_overlay()
+    with overlay["lock"]:
+        overlay["rows"].append((time.time(), sheet_name, dict(zip(columns, row))))
+
+def merge_overlay(df, sheet_name, scope_codes=None, emp_metric=None):
+    overlay = get_overlay()
+    expiry = time.time() - OVERLAY_TTL
+    with overlay["lock"]:
+        overlay["rows"] = [r for r in overlay["rows"] if r[0] >= expiry]
+        overlay["keys"] = {k: ts for k, ts in overlay["keys"].items() if ts >= expiry}
+        pending = [r[2] for r in overlay["rows"] if r[1] == sheet_name]
+    if not pending:
+        return df
+
+    extra = clean_commitment_achievement(pd.DataFrame(pending))
+    if scope_codes is not None:
+        extra = extra[extra["empcode"].isin(scope_codes)]
+    if emp_metric is not None:
+        extra = assign_metrics(extra, emp_metric).assign(followup_stage=followup_stage)
+
+    # Drop rows the cached sheet already contains (same empcode + submit timestamp)
+    if {"empcode", "timestamp"}.issubset(df.columns):
+        seen = set(zip(df["empcode"].astype(str), df["timestamp"].astype(str)))
+        keep = [
+            (e, t) not in seen
+            for e, t in zip(extra["empcode"].astype(str), extra["timestamp"].astype(str))
+        ]
+        extra = extra[keep]
+
+    if extra.empty:
+        return df
+    return pd.concat([df, extra], ignore_index=True)
+
+def claim_submission(key):
+    # Reserve an idempotency key; False if it was already submitted recently
+    overlay = get_overlay()
+    with overlay["lock"]:
+        if key in overlay["keys"]:
+            return False
+        overlay["keys"][key] = time.time()
+        return True
+
+def release_submission(key):
+    overlay = get_overlay()
+    with overlay["lock"]:
+        overlay["keys"].pop(key, None)
+
+def discard_from_overlay(sheet_name, rows, columns):
+    # Undo add_to_overlay for rows whose write failed
+    dropped = {(str(r["empcode"]), str(r["timestamp"])) for r in (dict(zip(columns, row)) for row in rows)}
+    overlay = get_overlay()
+    with overlay["lock"]:
+        overlay["rows"] = [
+            r for r in overlay["rows"]
+            if r[1] != sheet_name or (str(r[2].get("empcode")), str(r[2].get("timestamp"))) not in dropped
+        ]
+
+def settle_pending_writes():
+    # Writes still running after WRITE_WAIT are tracked per session; once they
+    # finish, failed ones are pulled back out of the overlay so they can be resubmitted
+    still_running, failed = [], 0
+    for write in st.session_state.pending_writes:
+        if not write["future"].done():
+            still_running.append(write)
+        elif write["future"].exception() is not None:
+            for key in write["keys"]:
+                release_submission(key)
+            discard_from_overlay("daily_commitments", write["rows"], write["columns"])
+            failed += len(write["rows"])
+    st.session_state.pending_writes = still_running
+    if failed:
+        st.session_state.failed_writes = st.session_state.get("failed_writes", 0) + failed
+
+def data_version(df):
+    # Sheets are append-only: row count + last submit timestamp identify a load
+    if df.empty:
+        return (0, "")
+    last = str(df["timestamp"].iloc[-1]) if "timestamp" in df.columns else ""
+    return (len(df), last)
+
+# ================= CHANNEL / METRIC LOOKUP =================
+METRIC_CONFIGS = {
+    "NOP": {"metric": "NOP", "commit_col": "commit_value", "ach_col": "ach_value", "symbol": ""},
+    "PREMIUM": {"metric": "PREMIUM", "commit_col": "commit_value", "ach_col": "ach_value", "symbol": "₹"},
+}
+CHANNEL_METRICS = {ch: "NOP" for ch in NOP_CHANNELS}
+
+# ================= WALLBOARD =================
+# Every display in the process shares one KpiBoard. A tick reads only the
+# rows appended since the previous one and adds them to the running totals;
+# displays that tick within WALLBOARD_MIN_GAP of it reuse that tick.
+WALLBOARD_REFRESH = 60  # seconds between display refreshes
+WALLBOARD_MIN_GAP = 20
+WALLBOARD_SHEETS = ["daily_commitments", "daily_achievement"]
+
+@st.cache_resource
+def wallboard_state():
+    return {"lock": threading.Lock(), "board": None}
+
+def tick_board(board, emp_metric):
+    # False when a cursor row moved and the board has to be rebuilt.
+    # Both sheets are read before either cursor advances, so a slow read
+    # leaves the board as it was.
+    sh = get_sheet()
+    fresh = not board.cursors
+    values = {name: sheets_io().call(read_rows, sh, name, board.tail_start(name)) for name in WALLBOARD_SHEETS}
+    frames = {name: board.take_tail(name, values[name]) for name in WALLBOARD_SHEETS}
+    if any(df is None for df in frames.values()):
+        return False
+    for name, df in frames.items():
+        if fresh and name in ARCHIVED_SHEETS:
+            # The current week can reach into a month archive.py already moved out
+            df = merge_archive(df, load_archive(name, archive_stamp(ARCHIVE_DIR, name)))
+        frames[name] = assign_metrics(clean_commitment_achievement(df), emp_metric)
+    commitments = frames["daily_commitments"]
+    board.apply(commitments, frames["daily_achievement"], submission_keys(commitments))
+    return True
+
+def refresh_wallboard(today):
+    state = wallboard_state()
+    with state["lock"]:
+        board = state["board"]
+        if board is not None and board.day == pd.Timestamp(today) and time.time() - board.updated_at < WALLBOARD_MIN_GAP:
+            return board
+        emp_metric = employee_metrics(users)
+        if board is None or board.day != pd.Timestamp(today):
+            board = KpiBoard(today)  # a new day moves every card window
+        if not tick_board(board, emp_metric):
+            board = KpiBoard(today)
+            tick_board(board, emp_metric)
+        state["board"] = board
+        return board
+
+def wallboard_table(summary, label, symbol):
+    table = pd.DataFrame({label: summary["value"]})
+    for window, title in [("today", "Today"), ("yesterday", "Yesterday"), ("week", "Week"), ("mtd", "MTD")]:
+        table[title] = summary[f"{window}_commitment"].map(lambda v: f"{symbol}{int(v):,}")
+        if window != "today":
+            table[f"{title} achieved"] = summary[f"{window}_achievement"].map(lambda v: f"{symbol}{int(v):,}")
+            table[f"{title} %"] = summary[f"{window}_%"]
+    table["MTD meetings"] = summary["mtd_meetings"].astype(int)
+    return table.iloc[summary["mtd_%"].argsort()[::-1]]
+
+@st.fragment(run_every=WALLBOARD_REFRESH)
+def show_wallboard():
+    try:
+        board = refresh_wallboard(date.today())
+    except Exception as e:
+        # Slow reads and 429s are routine for a display polling every minute.
+        # Cursors only advance once both reads are in, so the last board stands.
+        board = wallboard_state()["board"]
+        if isinstance(e, SheetTimeout):
+            st.warning("⏳ Google Sheets is responding slowly; showing the last update.")
+        else:
+            print(e)
+            st.warning("⚠️ Google Sheets refused the refresh; showing the last update.")
+        if board is None:
+            return
+
+    updated = datetime.fromtimestamp(board.updated_at, ist)
+    st.caption(f"Updated {updated:%I:%M:%S %p} · refreshes every minute")
+    for scope, label in WALLBOARD_SCOPES.items():
+        st.markdown(f"<div class='section-title'>{label} progress</div>", unsafe_allow_html=True)
+        summary = board.summary(scope)
+        if summary.empty:
+            st.info("No commitments this month yet.")
+            continue
+        for metric, part in summary.groupby("metric"):
+            st.caption(f"{label}s measured on {metric}")
+            table = wallboard_table(part, label, METRIC_CONFIGS.get(metric, METRIC_CONFIGS["PREMIUM"])["symbol"])
+            st.dataframe(table, use_container_width=True, hide_index=True)
+
+if wallboard:
+    st.markdown("### 📺 Sales Floor Wallboard")
+    show_wallboard()
+    st.stop()
+
+# ================= SHARED FACT STORE =================
+# Columns a sheet keeps when it failed to load, so pages render empty
+# instead of failing
+EMPTY_COLUMNS = {
+    "user_master": ["empcode", "empname", "team", "role", "channel"],
+    "daily_commitments": SHEET_COLUMNS,
+    "daily_achievement": ACHIEVEMENT_COLUMNS,
+    "lead_team_map": ["lead_empcode", "team"],
+}
+
+@st.cache_resource(ttl=LOAD_TTL, show_spinner=False)
+def fact_store():
+    # One cleaned, de-duplicated, metric-tagged copy per process, shared by
+    # every session without per-rerun copies. Treat it as read-only.
+    # user_master comes from the load_sheet() copy the login step already
+    # fetched; the other three are requested together, then collected.
+    names = ["daily_commitments", "daily_achievement", "lead_team_map"]
+    futures = {name: request_sheet(name) for name in names}
+    raw = {"user_master": load_sheet("user_master")}
+    raw.update({name: collect_sheet(name, futures[name]) for name in names})
+
+    # Quality checks see the raw values; cleaning below coerces them
+    load_errors = {name: df.attrs["load_error"] for name, df in raw.items() if "load_error" in df.attrs}
+    for name, df in raw.items():
+        if df.empty and len(df.columns) == 0:
+            raw[name] = pd.DataFrame(columns=EMPTY_COLUMNS[name])
+    quality = pd.concat(
+        [quality_issues(raw[name], name, raw["user_master"], list(CHANNEL_SCHEMAS))
+         for name in ["daily_commitments", "daily_achievement"]],
+        ignore_index=True
+    )
+    sheets = {name: clean_commitment_achievement(df) for name, df in raw.items()}
+
+    store_users = sheets["user_master"]
+    emp_metric = employee_metrics(store_users)
+    commitments, submission_index = dedupe_submissions(sheets["daily_commitments"])
+    commitments = assign_metrics(commitments, emp_metric).assign(followup_stage=followup_stage)
+    achievements = assign_metrics(sheets["daily_achievement"], emp_metric)
+    return {
+        "users": store_users,
+        "commitments": commitments,
+        "achievements": achievements,
+        "lead_team_map": sheets["lead_team_map"],
+        "submission_index": submission_index,
+        "achievement_index": key_index(achievements),
+        "emp_metric": emp_metric,
+        "teams_profile": team_profiles(store_users),
+        "quality": quality,
+        "load_errors": load_errors,
+        "version": (data_version(commitments), data_version(achievements)),
+    }
+
+# ================= SESSION SCOPE =================
+def session_scope(store, role, emp_code):
+    # User: own rows; Team Lead: self + members of the led teams; Management: all
+    if role == "User":
+        return ("user", (emp_code,))
+    if role == "Team Lead":
+        ltm = store["lead_team_map"]
+        led = ltm[ltm["lead_empcode"].astype(str) == emp_code]["team"]
+        members = store["users"][store["users"]["team"].isin(led)]["empcode"].astype(str)
+        return ("team", tuple(sorted(set(members) | {emp_code})))
+    return ("all", None)
+
+@st.cache_data(ttl=LOAD_TTL, show_spinner=False)
+def scoped_frames(_store, version, scope):
+    # A session's own slice, so its copies scale with its data, not the sheet
+    codes = list(scope[1])
+    c, a = _store["commitments"], _store["achievements"]
+    return (
+        c[c["empcode"].isin(codes)].reset_index(drop=True),
+        a[a["empcode"].isin(codes)].reset_index(drop=True),
+    )
+
+try:
+    store = fact_store()
+except SheetTimeout:
+    st.warning("⏳ Google Sheets is responding slowly. Please refresh in a moment.")
+    st.stop()
+scope = session_scope(store, st.session_state.role, st.session_state.emp_code)
+if scope[1] is None:
+    commitments, achievements = store["commitments"], store["achievements"]
+else:
+    commitments, achievements = scoped_frames(store, store["version"], scope)
+settle_pending_writes()
+commitments = merge_overlay(commitments, "daily_commitments", scope[1], store["emp_metric"])
+
+lead_team_map = store["lead_team_map"]
+teams_profile = store["teams_profile"]
+submission_index = store["submission_index"]
+
+# Derived caches are keyed by scope too: two sessions never share a slice's result
+frames_version = (scope, data_version(commitments), data_version(achievements))
+
+# ================= DEAL RECONCILIATION =================
+@st.cache_data(ttl=300, show_spinner=False)
+def deal_reconciliation(_commitments, _achievements, version, today):
+    # Full-history hash join, recomputed only when either sheet changes
+    return reconcile(_commitments, _achievements, today)
+
+reconciliation = deal_reconciliation(commitments, achievements, frames_version, date.today())
+
+# ================= TREND SERIES =================
+@st.cache_data(ttl=300, show_spinner=False)
+def trend_series(_commitments, _achievements, version, today):
+    # Daily + rolling 7/30 day series for every user, team and channel at once
+    return build_timeseries(_commitments, _achievements, today)
+
+trends = trend_series(commitments, achievements, frames_version, date.today())
+
+@st.cache_data(ttl=300, show_spinner=False)
+def period_prefix_sums(_series, version):
+    # Cumulative daily totals per scope for O(1) period-to-period lookups
+    return build_prefix_sums(_series)
+
+prefix_sums = period_prefix_sums(trends, frames_version)
+
+# ================= FOLLOW-UP PIPELINE =================
+@st.cache_data(ttl=LOAD_TTL, show_spinner=False)
+def stage_rates(_store, version, today):
+    # Conversion history comes from every deal, whatever the session's scope
+    return stage_conversion(reconcile(_store["commitments"], _store["achievements"], today))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def deal_pipeline(_commitments, _reconciliation, _conversion, version, today):
+    # Open commitments bucketed by closure date and weighted by stage conversion
+    return build_pipeline(_commitments, _reconciliation, _conversion, today)
+
+conversion = stage_rates(store, store["version"], date.today())
+pipeline = deal_pipeline(commitments, reconciliation, conversion, (frames_version, store["version"]), date.today())
+
+# ================= ORG HIERARCHY =================
+@st.cache_data(ttl=300, show_spinner=False)
+def org_tree(_users, _lead_team_map, version):
+    return build_org_tree(_users, _lead_team_map)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def period_rollup(_org, _prefix_sums, version, start, end):
+    # Every node of the org tree for one period, aggregated bottom-up once
+    return org_rollup(_org, employee_totals(_prefix_sums, start, end))
+
+org = org_tree(users, lead_team_map, (data_version(users), data_version(lead_team_map)))
 
 def show_meeting_table_mtd(df, title="📋 Meeting List (MTD)"):
     st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
@@ -297,12 +705,10 @@ if st.session_state.verified:
     with left:
         st.markdown('<div class="card">', unsafe_allow_html=True)
 
-        # ---------------- MONTH FILTER ----------------
-        # Ensure date columns are proper datetime
-        for df in [commitments, achievements]:
-            if "date" in df.columns:
-                df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        if store["load_errors"]:
+            st.warning("⚠️ Some data could not be refreshed from Google Sheets; figures may be incomplete or out of date.")
 
+        # ---------------- MONTH FILTER ----------------
         # Create Month options from commitments + achievements
         all_dates = pd.concat(
             [
@@ -346,10 +752,7 @@ if st.session_state.verified:
 
         # ---------------- METRIC CONFIG ----------------
         def get_metric_config(channel):
-            if channel in ["Association", "Renewal","Affiliate Renewal"]:
-                return {"metric": "NOP", "commit_col": "nop", "ach_col": "actual_nop", "symbol": ""}
-            else:
-                return {"metric": "PREMIUM", "commit_col": "expected_premium", "ach_col": "actual_premium", "symbol": "₹"}
+            return METRIC_CONFIGS[CHANNEL_METRICS.get(channel, "PREMIUM")]
 
         def calc_metric(df, start, end, col):
             if df.empty or col not in df.columns or "date" not in df.columns:
@@ -374,10 +777,8 @@ if st.session_state.verified:
             """, unsafe_allow_html=True)
 
         # ---------------- MAIN KPI DASHBOARD ----------------
-        def show_dashboard(commit_df, ach_df, title, channel):
-            cfg = get_metric_config(channel)
-            symbol = cfg["symbol"]
-            metric = cfg["metric"]
+        def show_dashboard(commit_df, ach_df, title, channel, metric=None):
+            cfg = METRIC_CONFIGS[metric] if metric else get_metric_config(channel)
 
             # Today / Yesterday / Weekly should show ONLY if current month selected
             if is_current_month:
@@ -393,6 +794,11 @@ if st.session_state.verified:
             m_c = calc_metric(commit_df, month_start_date, month_view_end, cfg["commit_col"])
             m_a = calc_metric(ach_df, month_start_date, month_view_end, cfg["ach_col"])
 
+            show_kpi_row(title, cfg, t_c, y_c, y_a, w_c, w_a, m_c, m_a)
+
+        def show_kpi_row(title, cfg, t_c, y_c, y_a, w_c, w_a, m_c, m_a):
+            symbol = cfg["symbol"]
+            metric = cfg["metric"]
             st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
             c1, c2, c3, c4 = st.columns(4)
 
@@ -497,6 +903,198 @@ if st.session_state.verified:
             with c3: kpi_card("📆 Weekly", f"{int(w_c):,}", f"Achieved: {int(w_a):,} | {round((w_a / w_c) * 100, 0) if w_c else 0}%")
             with c4: kpi_card("📊 MTD", f"{int(m_c):,}", f"Achieved: {int(m_a):,} | {round((m_a / m_c) * 100, 0) if m_c else 0}%")
 
+        # ---------------- DEAL RECONCILIATION ----------------
+        def show_reconciliation(rec, title):
+            st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
+            if rec.empty:
+                st.info("No deals with a Deal ID available.")
+                return
+            rec = rec[(rec["last_committed"].dt.date >= month_start_date) & (rec["last_committed"].dt.date <= month_view_end)]
+            if rec.empty:
+                st.info("No deals committed in selected month.")
+                return
+
+            counts = status_counts(rec)
+            lag = rec.loc[rec["status"] == "achieved", "lag_days"].mean()
+            lag_text = f"Avg {round(lag, 1)} days to close" if pd.notna(lag) else "Deals"
+
+            c1, c2, c3, c4 = st.columns(4)
+            with c1: kpi_card("✅ Achieved", f"{counts['achieved']:,}", lag_text)
+            with c2: kpi_card("🟡 Partial", f"{counts['partial']:,}", "Deals")
+            with c3: kpi_card("⏰ Slipped", f"{counts['slipped']:,}", "Past closure date")
+            with c4: kpi_card("🔵 Open", f"{counts['open']:,}", "Deals")
+
+            with st.expander("Deal list"):
+                table = rec.sort_values(["status", "closure_date"])
+                table = table[["deal_id", "empname", "team", "channel", "client_name", "closure_date",
+                               "committed", "achieved", "status", "lag_days"]]
+                st.dataframe(table, use_container_width=True)
+
+        # ---------------- TREND CHARTS ----------------
+        TREND_DAYS = 90
+
+        def show_trends(scope, value, title):
+            st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
+            window = st.radio(
+                "Window", list(WINDOWS.keys()), horizontal=True, key=f"trend_{scope}_{value}",
+                format_func=lambda w: {"daily": "Daily", "7d": "Rolling 7 days", "30d": "Rolling 30 days"}[w]
+            )
+            end = pd.Timestamp(month_view_end)
+            start = end - pd.Timedelta(days=TREND_DAYS - 1)
+            per_metric = scope_series(trends, scope, value, window, start, end)
+            if not per_metric:
+                st.info("No trend data available.")
+                return
+            for metric, frame in per_metric.items():
+                st.caption(f"Commitment vs Achievement ({metric})")
+                st.line_chart(frame[["commitment", "achievement"]])
+                st.caption(f"Achievement % ({metric})")
+                st.line_chart(frame[["achievement %"]])
+                if frame["meetings"].sum() > 0:
+                    st.caption("Meetings")
+                    st.bar_chart(frame[["meetings"]])
+
+        # ---------------- PERIOD COMPARISON ----------------
+        def show_period_comparison(scope, values, title):
+            st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
+            table = period_comparison(prefix_sums, scope, month_view_end)
+            if values is not None and not table.empty:
+                table = table[table[scope].isin(values)]
+            if table.empty:
+                st.info("No data available for comparison.")
+                return
+
+            st.caption(f"Day 1–{month_view_end.day} of {month_view_end:%b %Y} vs the same days of last month and last year")
+            table = table[[scope, "metric",
+                           "mtd_commitment", "mtd_achievement",
+                           "last_month_commitment", "last_month_achievement", "vs_last_month_%",
+                           "last_year_commitment", "last_year_achievement", "vs_last_year_%"]]
+            table.columns = [scope.title(), "Metric",
+                             "MTD Commitment", "MTD Achieved",
+                             "Last Month Commitment", "Last Month Achieved", "vs Last Month %",
+                             "Last Year Commitment", "Last Year Achieved", "vs Last Year %"]
+            st.dataframe(table, use_container_width=True, hide_index=True)
+
+        # ---------------- FOLLOW-UP PIPELINE ----------------
+        BUCKET_LABELS = {"overdue": "⏰ Overdue", "this week": "📆 This Week",
+                         "this month": "🗓️ This Month", "later": "⏭️ Later"}
+
+        def show_pipeline_buckets(pipe):
+            st.caption(f"Open commitments by expected closure date, as of {today:%d %b %Y}")
+            buckets = bucket_summary(pipe)
+            for metric in pipe["metric"].unique():
+                symbol = METRIC_CONFIGS[metric]["symbol"]
+                cols = st.columns(len(BUCKET_LABELS))
+                for col, (bucket, label) in zip(cols, BUCKET_LABELS.items()):
+                    deals, value = buckets.loc[(metric, bucket)]
+                    with col:
+                        kpi_card(label, f"{symbol}{int(value):,}", f"{int(deals):,} open ({metric})")
+
+            with st.expander("Follow-up funnel"):
+                funnel = stage_funnel(pipe, conversion).sort_values("followup_stage")
+                for metric, part in funnel.groupby("metric"):
+                    st.caption(f"Open value by follow-up stage ({metric})")
+                    st.bar_chart(part.set_index("stage")[["value"]], sort=False)
+                st.dataframe(funnel[["metric", "stage", "deals", "value", "conversion %"]],
+                             use_container_width=True, hide_index=True)
+
+        def show_pipeline(scope, values, title):
+            st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
+            pipe = pipeline if values is None else pipeline[pipeline[SCOPE_COLUMNS[scope]].isin(values)]
+            if pipe.empty:
+                st.info("No open commitments in the pipeline.")
+            else:
+                show_pipeline_buckets(pipe)
+
+            # The projection stands on MTD achievement even with nothing open
+            table = month_end_projection(pipeline, prefix_sums, scope, today)
+            if values is not None:
+                table = table[table[scope].isin(values)]
+            if table.empty:
+                return
+            st.caption("Month-end projection: MTD achieved + commitments due this month × historical conversion of their follow-up stage")
+            table.columns = [scope.title(), "Metric", "MTD Commitment", "MTD Achieved",
+                             "Pipeline Closing", "Expected", "Projected Month-End", "Projected %"]
+            st.dataframe(table, use_container_width=True, hide_index=True)
+
+        # ---------------- DATA QUALITY ----------------
+        def show_quality_report(title):
+            st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
+            for name, error in store["load_errors"].items():
+                st.error(f"❌ {name} could not be loaded: {error}")
+
+            report = store["quality"]
+            if report.empty:
+                st.success("✅ No data-quality issues found")
+                return
+
+            st.caption("Bad amounts count as 0 and undated rows fall outside every month until fixed in the sheet")
+            counts = issue_counts(report)
+            counts.columns = ["Sheet", "Issue", "Rows"]
+            st.dataframe(counts, use_container_width=True, hide_index=True)
+            with st.expander(f"Quarantined rows ({len(report):,})"):
+                st.dataframe(report.head(1000), use_container_width=True, hide_index=True)
+                st.download_button(
+                    "⬇️ Download quarantine report", report.to_csv(index=False),
+                    file_name="quarantine_report.csv", mime="text/csv"
+                )
+
+        # ---------------- ORG ROLLUPS ----------------
+        def rollup(start, end):
+            return period_rollup(org, prefix_sums, (frames_version, len(org)), pd.Timestamp(start), pd.Timestamp(end))
+
+        def team_card_values(team, metric):
+            # Today / yesterday / week / MTD for one team, read off the
+            # precomputed team nodes instead of re-filtering the rows
+            def total(start, end):
+                nodes = rollup(start, end)["team"]
+                if nodes.empty:
+                    return 0, 0
+                hit = nodes[(nodes["team"] == team) & (nodes["metric"] == metric)]
+                return (hit["commitment"].iloc[0], hit["achievement"].iloc[0]) if len(hit) else (0, 0)
+
+            m_c, m_a = total(month_start_date, month_view_end)
+            if not is_current_month:
+                return 0, 0, 0, 0, 0, m_c, m_a
+            t_c, _ = total(today, today)
+            y_c, y_a = total(yesterday, yesterday)
+            w_c, w_a = total(week_start, today)
+            return t_c, y_c, y_a, w_c, w_a, m_c, m_a
+
+        # ---------------- ORG DRILL-DOWN ----------------
+        def show_org_drilldown(title, channel=None):
+            # Channel -> lead -> team -> employee; channel=None offers every channel
+            st.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
+            levels = rollup(month_start_date, month_view_end)
+            if levels["management"].empty:
+                st.info("No data available for selected month.")
+                return
+
+            measures = ["metric", "commitment", "achievement", "achievement %", "meetings"]
+            channels_df = levels["channel"]
+            if channel is None:
+                st.dataframe(levels["management"][measures], use_container_width=True, hide_index=True)
+                st.dataframe(channels_df[["channel"] + measures], use_container_width=True, hide_index=True)
+                channel = st.selectbox("Select Channel", channels_df["channel"].unique().tolist(), key="org_channel")
+            st.dataframe(channels_df[channels_df["channel"] == channel][measures], use_container_width=True, hide_index=True)
+
+            leads = levels["lead"][levels["lead"]["channel"] == channel]
+            if leads.empty:
+                st.info(f"No {channel} data available for selected month.")
+                return
+            lmap = dict(zip(leads["lead_empcode"], leads["lead_name"]))
+            sl = st.selectbox("Select Lead", list(lmap.keys()), format_func=lambda x: f"{x} - {lmap[x]}" if x else lmap[x], key="org_lead")
+            st.dataframe(leads[leads["lead_empcode"] == sl][measures], use_container_width=True, hide_index=True)
+
+            teams = levels["team"][(levels["team"]["lead_empcode"] == sl) & (levels["team"]["channel"] == channel)]
+            st.dataframe(teams[["team"] + measures], use_container_width=True, hide_index=True)
+
+            team_names = teams["team"].unique().tolist()
+            if team_names:
+                stm = st.selectbox("Select Team", team_names, key="org_team")
+                emps = levels["employee"][levels["employee"]["team"] == stm]
+                st.dataframe(emps[["empcode", "empname", "channel"] + measures], use_container_width=True, hide_index=True)
+
         # ================= ROLE BASED =================
         role = st.session_state.get("role", "")
         emp_code = st.session_state.get("emp_code", "")
@@ -515,6 +1113,11 @@ if st.session_state.verified:
                 show_meeting_section(c)
                 show_meeting_table_mtd(c, f"📋 {st.session_state.channel} Meeting List (MTD)")
 
+            show_reconciliation(reconciliation[reconciliation["empcode"] == emp_code], "🔗 My Deal Status")
+            show_trends("user", emp_code, "📈 My Trend")
+            show_period_comparison("user", [emp_code], "🗓️ My Month-over-Month")
+            show_pipeline("user", [emp_code], "🧭 My Pipeline")
+
         # ---------- TEAM LEAD ----------
         elif role == "Team Lead":
             self_c = commitments[commitments["empcode"].astype(str) == emp_code]
@@ -533,12 +1136,18 @@ if st.session_state.verified:
             for t in teams:
                 tu = users[users["team"] == t]
                 codes = tu["empcode"].astype(str)
-                ch = tu["channel"].mode()[0]
+                ch = teams_profile["channel"].get(t, st.session_state.channel)
+                team_metrics = teams_profile["metrics"].get(t, [CHANNEL_METRICS.get(ch, "PREMIUM")])
 
-                tc = commitments[commitments["empcode"].astype(str).isin(codes)]
-                ta = achievements[achievements["empcode"].astype(str).isin(codes)]
+                # Mixed teams: each member is summed in their own metric
+                for metric in team_metrics:
+                    label = f"👥 Team – {t}" if len(team_metrics) == 1 else f"👥 Team – {t} ({metric})"
+                    show_kpi_row(label, METRIC_CONFIGS[metric], *team_card_values(t, metric))
 
-                show_dashboard(tc, ta, f"👥 Team – {t}", ch)
+                # Deal counts and meeting lists still need the team's rows
+                if ch in ["Renewal", "Affiliate", "Corporate"]:
+                    tc = commitments[commitments["empcode"].astype(str).isin(codes)]
+                    ta = achievements[achievements["empcode"].astype(str).isin(codes)]
 
                 if ch == "Renewal":
                     show_deal_commitment_dashboard(tc, ta, f"📌 Team – {t} Deal Commitment")
@@ -552,15 +1161,22 @@ if st.session_state.verified:
 
                 uc = commitments[commitments["empcode"].astype(str) == su]
                 ua = achievements[achievements["empcode"].astype(str) == su]
+                su_ch = dict(zip(tu["empcode"].astype(str), tu["channel"])).get(su, ch)
 
-                show_dashboard(uc, ua, f"👤 {umap[su]}", ch)
+                show_dashboard(uc, ua, f"👤 {umap[su]}", su_ch)
 
-                if ch == "Renewal":
+                if su_ch == "Renewal":
                     show_deal_commitment_dashboard(uc, ua, f"📌 {umap[su]} Deal Commitment")
 
-                if ch in ["Affiliate", "Corporate"]:
+                if su_ch in ["Affiliate", "Corporate"]:
                     show_meeting_section(uc)
-                    show_meeting_table_mtd(uc, f"📋 {ch} Meeting List (MTD) – {umap[su]}")
+                    show_meeting_table_mtd(uc, f"📋 {su_ch} Meeting List (MTD) – {umap[su]}")
+
+                show_reconciliation(reconciliation[reconciliation["empcode"].isin(codes)], f"🔗 Team – {t} Deal Status")
+                show_trends("team", t, f"📈 Team – {t} Trend")
+
+            show_period_comparison("team", list(teams), "🗓️ Team Month-over-Month")
+            show_pipeline("team", list(teams), "🧭 Team Pipeline")
 
         # ---------- MANAGEMENT ----------
         else:
@@ -577,8 +1193,8 @@ if st.session_state.verified:
                 a_df = achievements[achievements["channel"] == sel]
 
             if sel == "All Channels":
-                show_dashboard(c_df[c_df["channel"] == "Association"], a_df[a_df["channel"] == "Association"], "📦 NOP Dashboard", "Association")
-                show_dashboard(c_df[c_df["channel"] != "Association"], a_df[a_df["channel"] != "Association"], "💰 Premium Dashboard", "Cross Sell")
+                show_dashboard(c_df[c_df["metric"] == "NOP"], a_df[a_df["metric"] == "NOP"], "📦 NOP Dashboard", "Association", "NOP")
+                show_dashboard(c_df[c_df["metric"] == "PREMIUM"], a_df[a_df["metric"] == "PREMIUM"], "💰 Premium Dashboard", "Cross Sell", "PREMIUM")
                 show_meeting_section(c_df[c_df["channel"].isin(["Affiliate", "Corporate"])])
                 show_meeting_table_mtd(c_df[c_df["channel"].isin(["Affiliate", "Corporate"])], "📋 Meeting List (MTD)")
             elif sel == "Association":
@@ -593,6 +1209,19 @@ if st.session_state.verified:
                 show_meeting_section(c_df)
                 show_meeting_table_mtd(c_df, f"📋 {sel} Meeting List (MTD)")
 
+            rec = reconciliation if sel == "All Channels" else reconciliation[reconciliation["channel"] == sel]
+            show_reconciliation(rec, "🔗 Deal Reconciliation")
+            if sel == "All Channels":
+                show_trends("all", "All", "📈 Trend – All Channels")
+            else:
+                show_trends("channel", sel, f"📈 Trend – {sel}")
+            show_period_comparison("channel", None, "🗓️ Month-over-Month / Year-over-Year – All Channels")
+            show_pipeline("channel", None if sel == "All Channels" else [sel], "🧭 Pipeline & Month-End Projection")
+            show_org_drilldown(
+                "🌳 Org Drill-down (Channel → Lead → Team → Employee)", None if sel == "All Channels" else sel
+            )
+            show_quality_report("🧹 Data Quality – Quarantine Report")
+
             if sel != "All Channels":
                 um = users[users["channel"] == sel]
                 umap = dict(zip(um["empcode"].astype(str), um["empname"]))
@@ -620,7 +1249,7 @@ if st.session_state.verified and st.session_state.role != "Management":
         st.markdown('<div class="card">', unsafe_allow_html=True)
 
         if not form_allowed:
-            st.error("⛔ Commitment entry closed (11:30 AM crossed)")
+            st.error(f"⛔ Commitment entry closed ({cutoff:%I:%M %p} crossed)")
 
         st.subheader("📋 Daily Commitment Entry")
 
@@ -628,482 +1257,276 @@ if st.session_state.verified and st.session_state.role != "Management":
         channel = st.session_state.channel
         st.info(f"Channel : {channel}")
 
-        # ================= SAFE SELECTBOX =================
-        def safe_selectbox(label, options, key, default):
-            if key not in st.session_state:
-                st.session_state[key] = default
-            return st.selectbox(label, options, key=key)
-
-        # ================= DEFAULTS =================
-        association = client_name = deal_id = sub_product = ""
-        case_type = meeting_type = client_mobile = ""
-        expected_premium = commitment_nop = meeting_count = 0
-        deals_commitment = deals_created_product = deal_assigned_to = ""
-        followups = ""
-        closure_date = date.today()
-        product = ""
-
-        # ================= ASSOCIATION / RENEWAL =================
-        if channel in ["Association", "Renewal"]:
-
-            association = safe_selectbox(
-                "Association",
-                ["IMA", "IAP", "RMA", "MSBIRIA", "ISCP", "NON-IMA"],
-                f"{emp_code}_association",
-                "IMA"
-            )
-
-            product = safe_selectbox(
-                "Product",
-                ["PI", "HI", "Umbrella", "Other Products"],
-                f"{emp_code}_product",
-                "PI"
-            )
-
-            # For Association -> keep required fields
-            # For Renewal -> NOT required, so we will not show them
-            if channel == "Association":
-                client_name = st.text_input("Client Name", key=f"{emp_code}_client_name")
-                deal_id = st.text_input("Deal ID", key=f"{emp_code}_deal_id")
-
-                closure_date = st.date_input(
-                    "Expected Closure Date",
-                    key=f"{emp_code}_closure_date"
-                )
-            else:
-                # Renewal: Not required
-                client_name = ""
-                deal_id = ""
-                closure_date = date.today()
-
-            commitment_nop = st.number_input(
-                "Renewal Commitment" if channel == "Renewal" else "Commitment NOP",
-                min_value=0,
-                step=1,
-                key=f"{emp_code}_commitment_nop"
-            )
-
-            deals_commitment = st.text_input(
-                "Deals Commitment", key=f"{emp_code}_deals_commitment"
-            )
-
-            deals_created_product = safe_selectbox(
-                "Deals Created Product",
-                ["Health", "Life", "Fire", "Motor", "Misc"],
-                f"{emp_code}_deals_created_product",
-                "Health"
-            )
-
-            deal_assigned_to = safe_selectbox(
-                "Deal Assigned To",
-                ["Satish", "Divya", "Ravi Raj", "Rasika", "Manisha"],
-                f"{emp_code}_deal_assigned_to",
-                "Satish"
-            )
-
-            followups = safe_selectbox(
-                "Follow-up Count",
-                ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"],
-                f"{emp_code}_followups",
-                "1st"
-            )
-
-        # ================= CROSS SELL =================
-        elif channel == "Cross Sell":
-
-            product = safe_selectbox(
-                "Product",
-                ["Health", "Life", "Motor", "Fire", "Misc"],
-                f"{emp_code}_product",
-                "Health"
-            )
-
-            if product == "Health":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Port", "New"],
-                    f"{emp_code}_sub_product",
-                    "Port"
-                )
-            elif product == "Life":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Term", "Investment", "Traditional"],
-                    f"{emp_code}_sub_product",
-                    "Term"
-                )
-            elif product == "Motor":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Car", "Bike", "Commercial Vehicle"],
-                    f"{emp_code}_sub_product",
-                    "Car"
-                )
-            else:
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["New"],
-                    f"{emp_code}_sub_product",
-                    "New"
-                )
-
-            client_name = st.text_input("Client Name", key=f"{emp_code}_client_name")
-            deal_id = st.text_input("Deal ID", key=f"{emp_code}_deal_id")
-
-            expected_premium = st.number_input(
-                "Expected Premium",
-                min_value=0,
-                key=f"{emp_code}_expected_premium"
-            )
-
-            followups = safe_selectbox(
-                "Follow-up Count",
-                ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"],
-                f"{emp_code}_followups",
-                "1st"
-            )
-
-            closure_date = st.date_input(
-                "Expected Closure Date",
-                key=f"{emp_code}_closure_date"
-            )
-
-        # ================= AFFILIATE =================
-        elif channel == "Affiliate":
-
-            product = safe_selectbox(
-                "Product",
-                ["Health", "Life", "Motor", "Fire", "Misc"],
-                f"{emp_code}_product",
-                "Health"
-            )
-
-            if product == "Health":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Port", "New"],
-                    f"{emp_code}_sub_product",
-                    "Port"
-                )
-            elif product == "Life":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Term", "Investment", "Traditional"],
-                    f"{emp_code}_sub_product",
-                    "Term"
-                )
-            elif product == "Motor":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Car", "Bike", "Commercial Vehicle"],
-                    f"{emp_code}_sub_product",
-                    "Car"
-                )
+        def submit_meta():
+            return {
+                "date": date.today().strftime("%Y-%m-%d"),
+                "empcode": st.session_state.emp_code,
+                "empname": st.session_state.emp_name,
+                "team": st.session_state.team,
+                "timestamp": datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+
+        def submit_rows(rows):
+            # Drops duplicates (sheet, recent submits, same batch), writes the rest
+            # with a single append and returns (written, skipped).
+            # serialize_rows() always emits SHEET_COLUMNS order.
+            columns = SHEET_COLUMNS
+
+            keys = submission_keys(pd.DataFrame(rows, columns=columns)).tolist()
+            fresh, claimed = [], []
+            for row, key in zip(rows, keys):
+                key = int(key)
+                if key in submission_index or not claim_submission(key):
+                    continue
+                fresh.append(row)
+                claimed.append(key)
+
+            if not fresh:
+                return 0, len(rows)
+
+            if len(fresh) == 1:
+                future = sheets_io().write(append_row, get_sheet(), "daily_commitments", fresh[0])
             else:
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["New"],
-                    f"{emp_code}_sub_product",
-                    "New"
+                future = sheets_io().write(append_rows, get_sheet(), "daily_commitments", fresh)
+            try:
+                future.result(timeout=WRITE_WAIT)
+            except FutureTimeout:
+                # Slow API: the write carries on and is settled on a later rerun
+                st.session_state.pending_writes.append(
+                    {"future": future, "rows": fresh, "columns": columns, "keys": claimed}
                 )
-
-            meeting_count = st.number_input(
-                "Meeting Count",
-                min_value=0,
-                step=1,
-                key=f"{emp_code}_meeting_count"
-            )
-
-            expected_premium = st.number_input(
-                "Expected Premium",
-                min_value=0,
-                key=f"{emp_code}_expected_premium"
+            except Exception as e:
+                # Same outcome as a write that fails after WRITE_WAIT
+                print(e)
+                for key in claimed:
+                    release_submission(key)
+                st.error(f"❌ {len(fresh)} commitment(s) could not be saved. Please submit them again.")
+                st.stop()
+
+            # Show the new rows right away instead of waiting for the cache TTL
+            for row in fresh:
+                add_to_overlay("daily_commitments", row, columns)
+            return len(fresh), len(rows) - len(fresh)
+
+        def finish_submit(count, skipped=0):
+            # ✅ inline message WITH TIMESTAMP
+            st.session_state.form_submitted = True
+            st.session_state.submitted_count = count
+            st.session_state.submitted_skipped = skipped
+            st.session_state.submitted_time = datetime.now(ZoneInfo("Asia/Kolkata")).strftime(
+                "%d %b %Y, %I:%M %p"
             )
 
-            meeting_type = safe_selectbox(
-                "Meeting Type",
-                ["Visit Partner", "Partner Client", "Self Business"],
-                f"{emp_code}_meeting_type",
-                "Visit Partner"
-            )
-
-            followups = safe_selectbox(
-                "Follow-up Count",
-                ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"],
-                f"{emp_code}_followups",
-                "1st"
-            )
-
-            closure_date = st.date_input(
-                "Expected Closure Date",
-                key=f"{emp_code}_closure_date"
-            )
-
-
-        # ================= AFFILIATE =================
-        elif channel == "Affiliate Renewal":
-
-            commitment_nop = st.number_input(
-                "Renewal Commitment" if channel == "Affiliate Renewal" else "Commitment NOP",
-                min_value=0,
-                step=1,
-                key=f"{emp_code}_commitment_nop"
-            )
-
-            client_name = st.text_input("Client Name", key=f"{emp_code}_client_name")
-            product = safe_selectbox(
-                "Product",
-                ["Health", "Life", "Motor", "Fire", "Misc"],
-                f"{emp_code}_product",
-                "Health"
-            )
-
-            if product == "Health":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Port", "New"],
-                    f"{emp_code}_sub_product",
-                    "Port"
-                )
-            elif product == "Life":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Term", "Investment", "Traditional"],
-                    f"{emp_code}_sub_product",
-                    "Term"
-                )
-            elif product == "Motor":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Car", "Bike", "Commercial Vehicle"],
-                    f"{emp_code}_sub_product",
-                    "Car"
-                )
-            else:
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["New"],
-                    f"{emp_code}_sub_product",
-                    "New"
-                )
+            # CLEAR ONLY AFTER SUBMIT
+            for k in list(st.session_state.keys()):
+                if k.startswith(emp_code):
+                    del st.session_state[k]
 
-            expected_premium = st.number_input(
-                "Expected Premium",
-                min_value=0,
-                key=f"{emp_code}_expected_premium"
-            )
+            st.rerun()
 
-            followups = safe_selectbox(
-                "Follow-up Count",
-                ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"],
-                f"{emp_code}_followups",
-                "1st"
+        # ✅ SHOW SUCCESS MESSAGE AFTER SUBMIT (INLINE)
+        if st.session_state.get("form_submitted"):
+            count = st.session_state.get("submitted_count", 1)
+            label = "Commitment" if count == 1 else f"{count} commitments"
+            st.success(f"✅ {label} submitted successfully at {st.session_state.submitted_time}")
+            if st.session_state.get("submitted_skipped"):
+                st.warning(f"⚠️ {st.session_state.submitted_skipped} duplicate row(s) were already submitted today and were skipped")
+
+        if st.session_state.pending_writes:
+            saving = sum(len(w["rows"]) for w in st.session_state.pending_writes)
+            st.info(f"⏳ {saving} commitment(s) still saving to Google Sheets")
+        if st.session_state.get("failed_writes"):
+            st.error(f"❌ {st.session_state.failed_writes} commitment(s) could not be saved. Please submit them again.")
+            st.session_state.failed_writes = 0
+
+        entry_mode = st.radio("Entry Mode", ["Single", "Bulk"], horizontal=True, key="entry_mode")
+
+        # ================= BULK ENTRY =================
+        if entry_mode == "Bulk":
+            grid = st.data_editor(
+                grid_template(channel),
+                num_rows="dynamic",
+                column_config=grid_column_config(channel),
+                use_container_width=True,
+                key=f"{emp_code}_bulk_grid"
             )
 
-            closure_date = st.date_input(
-                "Expected Closure Date",
-                key=f"{emp_code}_closure_date"
+            pasted = st.text_area(
+                "Or paste CSV (header row with the column names above)",
+                key=f"{emp_code}_bulk_csv"
             )
-        # ================= CORPORATE =================
-        elif channel == "Corporate":
 
-            client_name = st.text_input("Client Name", key=f"{emp_code}_client_name")
-            client_mobile = st.text_input("Client Mobile", key=f"{emp_code}_client_mobile")
+            with st.form("bulk_submit_form"):
+                bulk_submit = st.form_submit_button("🚀 Submit All Commitments", disabled=not form_allowed)
+
+                if bulk_submit:
+                    if pasted.strip():
+                        try:
+                            entries = pd.read_csv(io.StringIO(pasted.strip()), dtype=str)
+                        except Exception as e:
+                            st.error(f"❌ Could not read pasted CSV: {e}")
+                            st.stop()
+                        entries.columns = entries.columns.str.strip().str.lower().str.replace(" ", "_")
+                    else:
+                        entries = grid.copy()
+
+                    entries = entries.dropna(how="all").reset_index(drop=True)
+                    if entries.empty:
+                        st.error("❌ Add at least one row")
+                        st.stop()
+
+                    # Same channel rules as the single form, for every row in one pass
+                    entries = normalize(channel, entries)
+                    errors = validate_frame(channel, entries)
+                    if errors:
+                        for pos, e in errors:
+                            st.error(f"Row {pos + 1}: {e}")
+                        st.stop()
+
+                    written, skipped = submit_rows(serialize_rows(channel, entries, submit_meta()))
+                    if not written:
+                        st.warning("⚠️ All rows were already submitted today")
+                        st.stop()
+                    finish_submit(written, skipped)
+
+        # ================= SINGLE ENTRY =================
+        else:
+            values = render_fields(channel, emp_code)
 
-            case_type = safe_selectbox(
-                "Case Type",
-                ["New", "Renewal"],
-                f"{emp_code}_case_type",
-                "New"
-            )
+            # ================= SUBMIT =================
+            with st.form("submit_form"):
+                submit = st.form_submit_button("🚀 Submit Commitment", disabled=not form_allowed)
 
-            product = safe_selectbox(
-                "Product",
-                ["EB", "NON EB", "Retail"],
-                f"{emp_code}_product",
-                "EB"
-            )
+                if submit:
+                    entry = normalize(channel, pd.DataFrame([values]))
 
-            if product == "EB":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["GMC", "GPA", "GTL"],
-                    f"{emp_code}_sub_product",
-                    "GMC"
-                )
-            elif product == "NON EB":
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["DNO", "Liability", "WC", "Fire", "Marine"],
-                    f"{emp_code}_sub_product",
-                    "DNO"
-                )
-            else:
-                sub_product = safe_selectbox(
-                    "Sub Product",
-                    ["Motor", "Fire", "Health"],
-                    f"{emp_code}_sub_product",
-                    "Motor"
-                )
+                    # ---------------- MANDATORY FIELD VALIDATION ----------------
+                    errors = validate_frame(channel, entry)
 
-            meeting_count = st.number_input(
-                "Meeting Count",
-                min_value=0,
-                step=1,
-                key=f"{emp_code}_meeting_count"
-            )
+                    # If any errors -> stop submit
+                    if errors:
+                        for _, e in errors:
+                            st.error(e)
+                        st.stop()
 
-            meeting_type = safe_selectbox(
-                "Meeting Type",
-                ["With Kedar", "With Prathmesh", "Individual"],
-                f"{emp_code}_meeting_type",
-                "With Kedar"
-            )
+                    written, _ = submit_rows(serialize_rows(channel, entry, submit_meta()))
+                    if not written:
+                        st.warning("⚠️ This commitment was already submitted today")
+                        st.stop()
 
-            deal_id = ""
+                    finish_submit(written)
 
-            expected_premium = st.number_input(
-                "Expected Premium",
-                min_value=0,
-                key=f"{emp_code}_expected_premium"
-            )
+        st.markdown("</div>", unsafe_allow_html=True)
 
-            followups = safe_selectbox(
-                "Follow-up Count",
-                ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"],
-                f"{emp_code}_followups",
-                "1st"
-            )
+# ================= ACHIEVEMENT IMPORT =================
+IMPORT_BATCH = 5000  # rows per append_rows call
 
-            closure_date = st.date_input(
-                "Expected Closure Date",
-                key=f"{emp_code}_closure_date"
-            )
+if st.session_state.verified and st.session_state.role == "Management":
+    with left:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
 
-        # ✅ SHOW SUCCESS MESSAGE AFTER SUBMIT (INLINE)
-        if st.session_state.get("form_submitted"):
-            st.success(f"✅ Commitment submitted successfully at {st.session_state.submitted_time}")
-
-        # ================= SUBMIT =================
-        with st.form("submit_form"):
-            submit = st.form_submit_button("🚀 Submit Commitment", disabled=not form_allowed)
-
-            if submit:
-                submit_time = datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S")
-
-                # ---------------- MANDATORY FIELD VALIDATION ----------------
-                errors = []
-
-                # Common mandatory for all channels
-                if not product or str(product).strip() == "":
-                    errors.append("❌ Product is mandatory")
-
-                # Channel wise mandatory
-                if channel == "Cross Sell":
-                    if not client_name.strip():
-                        errors.append("❌ Client Name is mandatory")
-                    if not deal_id.strip():
-                        errors.append("❌ Deal ID is mandatory")
-                    if expected_premium <= 0:
-                        errors.append("❌ Expected Premium must be greater than 0")
-                    if not closure_date:
-                        errors.append("❌ Expected Closure Date is mandatory")
-
-                elif channel == "Affiliate":
-                    if meeting_count <= 0:
-                        errors.append("❌ Meeting Count must be greater than 0")
-                    if expected_premium <= 0:
-                        errors.append("❌ Expected Premium must be greater than 0")
-                    if not meeting_type.strip():
-                        errors.append("❌ Meeting Type is mandatory")
-                    if not closure_date:
-                        errors.append("❌ Expected Closure Date is mandatory")
-
-                elif channel == "Corporate":
-                    if not client_name.strip():
-                        errors.append("❌ Client Name is mandatory")
-                    if not client_mobile.strip():
-                        errors.append("❌ Client Mobile is mandatory")
-                    if meeting_count <= 0:
-                        errors.append("❌ Meeting Count must be greater than 0")
-                    if expected_premium <= 0:
-                        errors.append("❌ Expected Premium must be greater than 0")
-                    if not meeting_type.strip():
-                        errors.append("❌ Meeting Type is mandatory")
-                    if not closure_date:
-                        errors.append("❌ Expected Closure Date is mandatory")
-
-                elif channel == "Association":
-                    if not association.strip():
-                        errors.append("❌ Association is mandatory")
-                    if not client_name.strip():
-                        errors.append("❌ Client Name is mandatory")
-                    if not deal_id.strip():
-                        errors.append("❌ Deal ID is mandatory")
-                    if commitment_nop <= 0:
-                        errors.append("❌ Commitment NOP must be greater than 0")
-                    if not closure_date:
-                        errors.append("❌ Expected Closure Date is mandatory")
-
-                elif channel == "Renewal":
-                    if not association.strip():
-                        errors.append("❌ Association is mandatory")
-                    if commitment_nop <= 0:
-                        errors.append("❌ Renewal Commitment must be greater than 0")
-                    if not deals_commitment.strip():
-                        errors.append("❌ Deals Commitment is mandatory")
-                    if not deals_created_product.strip():
-                        errors.append("❌ Deals Created Product is mandatory")
-                    if not deal_assigned_to.strip():
-                        errors.append("❌ Deal Assigned To is mandatory")
-
-                # If any errors -> stop submit
-                if errors:
-                    for e in errors:
-                        st.error(e)
-                    st.stop()
-
-                append_row(
-                    sh,
-                    "daily_commitments",
-                    [
-                        date.today().strftime("%Y-%m-%d"),
-                        st.session_state.emp_code,
-                        st.session_state.emp_name,
-                        st.session_state.team,
-                        channel,
-                        association,
-                        client_name,
-                        product,
-                        sub_product,
-                        expected_premium,
-                        commitment_nop,
-                        meeting_count,
-                        followups,
-                        closure_date.strftime("%Y-%m-%d"),
-                        deal_id,
-                        deals_commitment,
-                        deals_created_product,
-                        deal_assigned_to,
-                        case_type,
-                        "",
-                        meeting_type,
-                        client_mobile,
-                        submit_time
+        st.subheader("📥 Achievement Import")
+        st.caption("CSV or Excel with date, empcode and actual_premium / actual_nop / deals_achieved")
+
+        def import_achievements(upload):
+            # Streams the file chunk by chunk: validate, skip rows already in the
+            # sheet (or earlier in the file) and append in large batches
+            header = sheets_io().call(sheet_header, get_sheet(), "daily_achievement")
+            header = header or ACHIEVEMENT_COLUMNS
+            progress = st.progress(0.0, text="Reading file…")
+            summary = {"imported": 0, "duplicates": 0, "errors": [], "failed": None}
+            pending, pending_keys = [], []
+            first_row = 2
+
+            def write_batch(rows, keys):
+                try:
+                    sheets_io().write(append_rows, get_sheet(), "daily_achievement", rows).result()
+                except Exception:
+                    for key in keys:
+                        release_submission(key)
+                    raise
+                summary["imported"] += len(rows)
+
+            try:
+                for chunk, done in read_chunks(upload, upload.name):
+                    if first_row == 2 and missing_columns(chunk.columns):
+                        st.error(f"❌ Missing columns: {', '.join(missing_columns(chunk.columns))}")
+                        return None
+
+                    valid, errors = prepare_chunk(chunk, users, first_row)
+                    first_row += len(chunk)
+                    summary["errors"] += errors
+
+                    keys = achievement_keys(valid)
+                    fresh = [
+                        bool(new) and claim_submission(int(key))
+                        for key, new in zip(keys, unseen(keys, store["achievement_index"]))
                     ]
+                    summary["duplicates"] += len(fresh) - sum(fresh)
+                    pending += achievement_rows(valid.loc[fresh], header)
+                    pending_keys += [int(key) for key, ok in zip(keys, fresh) if ok]
+
+                    while len(pending) >= IMPORT_BATCH:
+                        rows, keys_done = pending[:IMPORT_BATCH], pending_keys[:IMPORT_BATCH]
+                        pending, pending_keys = pending[IMPORT_BATCH:], pending_keys[IMPORT_BATCH:]
+                        write_batch(rows, keys_done)
+                    progress.progress(done, text=f"{summary['imported']:,} rows imported…")
+
+                if pending:
+                    rows, keys_done, pending, pending_keys = pending, pending_keys, [], []
+                    write_batch(rows, keys_done)
+            except ImportError:
+                raise
+            except Exception as e:
+                # Stop, but report the batches already in the sheet; a re-run
+                # skips them as duplicates
+                print(e)
+                for key in pending_keys:
+                    release_submission(key)
+                summary["failed"] = f"{type(e).__name__}: {e}"
+                return summary
+            progress.progress(1.0, text=f"{summary['imported']:,} rows imported")
+            return summary
+
+        summary = st.session_state.get("import_summary")
+        if summary:
+            st.success(f"✅ {summary['imported']:,} achievement row(s) imported")
+            if summary.get("failed"):
+                st.error(
+                    f"❌ Import stopped: {summary['failed']}. Rows after those were not imported; "
+                    "run the import again and the rows already in the sheet will be skipped."
                 )
-
-                # ✅ inline message WITH TIMESTAMP
-                st.session_state.form_submitted = True
-                st.session_state.submitted_time = datetime.now(ZoneInfo("Asia/Kolkata")).strftime(
-                    "%d %b %Y, %I:%M %p"
+            if summary["duplicates"]:
+                st.warning(f"⚠️ {summary['duplicates']:,} row(s) were already in the sheet and were skipped")
+            if summary["errors"]:
+                rejected = pd.DataFrame(summary["errors"], columns=["Row", "Problem"])
+                st.error(f"❌ {len(rejected):,} row(s) were rejected")
+                st.dataframe(rejected.head(1000), use_container_width=True, hide_index=True)
+                st.download_button(
+                    "⬇️ Download rejected rows", rejected.to_csv(index=False),
+                    file_name="rejected_achievements.csv", mime="text/csv"
                 )
 
-                # CLEAR ONLY AFTER SUBMIT
-                for k in list(st.session_state.keys()):
-                    if k.startswith(emp_code):
-                        del st.session_state[k]
-
+        upload = st.file_uploader("Achievement file", type=["csv", "xlsx"], key="achievement_upload")
+        if upload is not None and st.button("📥 Import Achievements"):
+            try:
+                summary = import_achievements(upload)
+            except ImportError:
+                st.error("❌ Excel import needs openpyxl installed. Upload a CSV instead.")
+                summary = None
+            except SheetTimeout:
+                st.error("⏳ Google Sheets is responding slowly. Please try the import again in a moment.")
+                summary = None
+            except Exception as e:
+                # Only the header read runs outside the import's own handling;
+                # nothing was written yet
+                print(e)
+                st.error(f"❌ Could not start the import: {type(e).__name__}: {e}")
+                summary = None
+            if summary is not None:
+                # Dashboards pick the new rows up from the next load
+                fact_store.clear()
+                st.session_state.import_summary = summary
                 st.rerun()
 
         st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,197 @@
+# Moves closed months of the append-only sheets out of the live worksheets
+# into gzip'd CSV partitions, archive/<sheet>/<YYYY-MM>.csv.gz. The app reads
+# live + archive, so history stays selectable while every refresh only
+# downloads the recent months.
+# Usage: python archive.py [--keep-months N] [--apply]
+# Without --apply it only reports what would move. Run it off-hours.
+import argparse
+import glob
+import os
+import tempfile
+from datetime import date
+
+import pandas as pd
+
+ARCHIVE_DIR = os.environ.get(
+    "ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+)
+ARCHIVED_SHEETS = ["daily_commitments", "daily_achievement"]
+SPREADSHEET = "Sales_Commitment_Tracker"
+KEEP_MONTHS = 1  # live sheet keeps the current month only
+
+
+# ================= PARTITIONS =================
+def partition_path(directory, sheet_name, month):
+    return os.path.join(directory, sheet_name, f"{month}.csv.gz")
+
+
+def partitions(directory, sheet_name):
+    return sorted(glob.glob(os.path.join(directory, sheet_name, "*.csv.gz")))
+
+
+def archive_stamp(directory, sheet_name):
+    # Changes whenever a partition is written; keys the app's archive cache
+    return tuple((os.path.basename(p), os.path.getmtime(p)) for p in partitions(directory, sheet_name))
+
+
+def read_partition(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def read_archive(directory, sheet_name):
+    files = partitions(directory, sheet_name)
+    if not files:
+        return pd.DataFrame()
+    return pd.concat([read_partition(f) for f in files], ignore_index=True)
+
+
+def row_hashes(df, columns):
+    return pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+
+
+def merge_archive(live, archive):
+    # Archive rows first, then live. Rows still present in the live sheet
+    # (read while the job was between writing and deleting) come from live only.
+    if archive.empty:
+        return live
+    if live.empty:
+        return archive
+    common = [c for c in archive.columns if c in live.columns]
+    archive = archive[~row_hashes(archive, common).isin(set(row_hashes(live, common)))]
+    return pd.concat([archive, live], ignore_index=True)
+
+
+def unarchived(stored, frame):
+    # Rows of frame not in stored yet, counted per copy: identical rows are
+    # legitimate (daily_achievement has no timestamp), so a row stored twice
+    # and sent three times adds one more copy, never collapses to one
+    columns = list(frame.columns)
+    if stored.empty or not set(columns).issubset(stored.columns):
+        return frame
+    have = row_hashes(stored, columns).value_counts()
+    hashes = row_hashes(frame, columns)
+    copy_number = hashes.groupby(hashes).cumcount()
+    return frame[(copy_number >= hashes.map(have).fillna(0)).to_numpy()]
+
+
+def write_partition(path, frame):
+    # Merge with what is archived already (a re-run after a failed delete must
+    # not double rows), then write-and-rename so readers never see half a file
+    frame = frame.astype(str)
+    if os.path.exists(path):
+        stored = read_partition(path)
+        frame = pd.concat([stored, unarchived(stored, frame)], ignore_index=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".csv.gz")
+    os.close(fd)
+    frame.to_csv(tmp, index=False, compression="gzip")
+    os.replace(tmp, path)
+
+
+def verify_partition(path, frame):
+    # Every row about to leave the live sheet must be readable from the
+    # archive, as many times as it occurs in the sheet
+    stored = read_partition(path)
+    columns = list(frame.columns)
+    if not set(columns).issubset(stored.columns):
+        return False
+    have = row_hashes(stored, columns).value_counts()
+    need = row_hashes(frame, columns).value_counts()
+    return bool((need <= have.reindex(need.index, fill_value=0)).all())
+
+
+# ================= LIVE SHEET =================
+def sheet_frame(ws):
+    # Values typed the way get_all_records types them, so archived and live
+    # rows compare equal; index = sheet row number
+    from gspread.utils import numericise_all
+
+    values = ws.get_all_values()
+    if len(values) < 2:
+        return pd.DataFrame()
+    header = values[0]
+    rows = [numericise_all(r + [""] * (len(header) - len(r)))[:len(header)] for r in values[1:]]
+    return pd.DataFrame(rows, columns=header, index=range(2, len(values) + 1))
+
+
+def cold_months(df, today, keep_months):
+    # YYYY-MM per row for months before the kept window; rows without a
+    # readable date stay live
+    date_col = next((c for c in df.columns if c.strip().lower() == "date"), None)
+    if date_col is None:
+        return pd.Series(None, index=df.index, dtype="object")
+    months = pd.to_datetime(df[date_col], errors="coerce").dt.strftime("%Y-%m")
+    cutoff = (pd.Timestamp(today).replace(day=1) - pd.DateOffset(months=keep_months - 1)).strftime("%Y-%m")
+    return months.where(months < cutoff)
+
+
+def row_ranges(rows):
+    # Contiguous (first, last) sheet row runs, bottom-most first so earlier
+    # deletions don't shift later ones; rows appended meanwhile are below them all
+    ranges = []
+    for row in sorted(rows):
+        if ranges and row == ranges[-1][1] + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in reversed(ranges)]
+
+
+def delete_rows(sh, ws, rows):
+    # One batch_update, applied in order, so the sheet is never half-trimmed
+    requests = [
+        {"deleteDimension": {"range": {
+            "sheetId": ws.id, "dimension": "ROWS", "startIndex": first - 1, "endIndex": last
+        }}}
+        for first, last in row_ranges(rows)
+    ]
+    if requests:
+        sh.batch_update({"requests": requests})
+
+
+def archive_sheet(sh, sheet_name, today, keep_months=KEEP_MONTHS, apply=False, directory=ARCHIVE_DIR):
+    ws = sh.worksheet(sheet_name)
+    df = sheet_frame(ws)
+    if df.empty:
+        print(f"{sheet_name}: empty")
+        return 0
+
+    months = cold_months(df, today, keep_months)
+    cold = months.dropna()
+    if cold.empty:
+        print(f"{sheet_name}: nothing to archive ({len(df):,} live rows)")
+        return 0
+
+    for month, rows in cold.groupby(cold).groups.items():
+        print(f"{sheet_name}: {month} -> {len(rows):,} rows")
+    if not apply:
+        print(f"{sheet_name}: dry run, {len(cold):,} of {len(df):,} rows would move (use --apply)")
+        return 0
+
+    for month, rows in cold.groupby(cold).groups.items():
+        path = partition_path(directory, sheet_name, month)
+        write_partition(path, df.loc[rows])
+        if not verify_partition(path, df.loc[rows]):
+            raise RuntimeError(f"{path} did not verify; live sheet left untouched")
+
+    delete_rows(sh, ws, cold.index)
+    print(f"{sheet_name}: archived {len(cold):,} rows, {len(df) - len(cold):,} stay live")
+    return len(cold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed months of the live sheets")
+    parser.add_argument("--keep-months", type=int, default=KEEP_MONTHS,
+                        help="months kept live, counting the current one")
+    parser.add_argument("--apply", action="store_true", help="write the archive and trim the live sheets")
+    args = parser.parse_args()
+
+    from sheets import get_client
+
+    sh = get_client().open(SPREADSHEET)
+    for sheet_name in ARCHIVED_SHEETS:
+        archive_sheet(sh, sheet_name, date.today(), max(args.keep_months, 1), args.apply)
+
+
+if __name__ == "__main__":
+    main()
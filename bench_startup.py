@@ -0,0 +1,49 @@
+# Time-to-first-render of the login page, each run in a fresh interpreter so
+# cold imports are included. No credentials needed: nothing talks to Google
+# before Verify.
+# Usage: python bench_startup.py [runs]
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RUN_ONCE = """
+import time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=60)
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+assert not at.exception, at.exception
+assert len(at.text_input) == 1, "login box did not render"
+print(t2 - t1, t2 - t0)
+"""
+
+
+def bench(runs=5):
+    first_render, total = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", RUN_ONCE],
+            cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.split()
+        first_render.append(float(out[-2]))
+        total.append(float(out[-1]))
+
+    def summary(values):
+        values = sorted(values)
+        return {
+            "median_s": round(statistics.median(values), 3),
+            "p95_s": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            "max_s": round(values[-1], 3),
+        }
+
+    return {"runs": runs, "first_render": summary(first_render), "with_test_harness_import": summary(total)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5), indent=2))
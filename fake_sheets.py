@@ -0,0 +1,198 @@
+# In-memory stand-in for the gspread client, selected with SHEETS_BACKEND=fake.
+# Every call sleeps for the configured latency and fails with a 429 at the
+# configured rate, so load tests see Google-like behaviour without credentials.
+# Defaults come from FAKE_SHEETS_LATENCY (seconds), FAKE_SHEETS_429_RATE (0-1),
+# FAKE_SHEETS_USERS and FAKE_SHEETS_DAYS; loadtest.py calls reset() instead.
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import requests
+from gspread.exceptions import APIError
+
+from forms import SHEET_COLUMNS, CHANNEL_SCHEMAS, FOLLOWUP_OPTIONS
+from ingest import ACHIEVEMENT_COLUMNS
+
+TEAM_SIZE = 10
+
+
+def rate_limited():
+    response = requests.Response()
+    response.status_code = 429
+    response._content = json.dumps(
+        {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}}
+    ).encode()
+    return APIError(response)
+
+
+# ================= SEED DATA =================
+def seed(users=50, days=60):
+    # users User accounts in teams of TEAM_SIZE, one lead per team and one
+    # Management account; one commitment per user per day, half achieved
+    channels = list(CHANNEL_SCHEMAS)
+    people = []
+    for i in range(users):
+        team = f"T{i // TEAM_SIZE + 1}"
+        people.append([1000 + i, f"User {i}", team, "User", channels[(i // TEAM_SIZE) % len(channels)]])
+    teams = sorted({p[2] for p in people})
+    leads = [[9000 + k, f"Lead {t}", t, "Team Lead", channels[k % len(channels)]] for k, t in enumerate(teams)]
+    people += leads + [[9999, "Management", "HQ", "Management", channels[0]]]
+
+    commitments, achievements = [], []
+    today = date.today()
+    for n in range(days, 0, -1):
+        day = today - timedelta(days=n)
+        for code, name, team, role, channel in people:
+            if role == "Management":
+                continue
+            row = dict.fromkeys(SHEET_COLUMNS, "")
+            row.update(
+                date=day.isoformat(), empcode=code, empname=name, team=team, channel=channel,
+                client_name=f"Client {code}-{n}", deal_id=f"D{code}-{n}", product="Health",
+                expected_premium=1000 * (n % 5 + 1), commitment_nop=n % 3 + 1, meeting_count=n % 2,
+                followups=FOLLOWUP_OPTIONS[n % len(FOLLOWUP_OPTIONS)],
+                closure_date=(day + timedelta(days=10)).isoformat(),
+                timestamp=f"{day.isoformat()} 10:{code % 60:02d}:00",
+            )
+            commitments.append([row[c] for c in SHEET_COLUMNS])
+            if n % 2 == 0:
+                achievements.append([
+                    (day + timedelta(days=3)).isoformat(), code, name, team, channel,
+                    f"D{code}-{n}", f"Client {code}-{n}", 800 * (n % 5 + 1), n % 3, 1
+                ])
+
+    return {
+        "user_master": [["EmpCode", "EmpName", "Team", "Role", "Channel"]] + people,
+        "lead_team_map": [["lead_empcode", "team"]] + [[lead[0], lead[2]] for lead in leads],
+        "daily_commitments": [SHEET_COLUMNS] + commitments,
+        "daily_achievement": [ACHIEVEMENT_COLUMNS] + achievements,
+    }
+
+
+# ================= FAKE GSPREAD =================
+class FakeBackend:
+    def __init__(self, latency=0.2, error_rate=0.0, users=50, days=60):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.data = seed(users, days)
+        self.calls = Counter()
+        self.errors = Counter()
+
+    def call(self, method):
+        with self.lock:
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if random.random() < self.error_rate:
+            with self.lock:
+                self.errors[method] += 1
+            raise rate_limited()
+
+
+class FakeWorksheet:
+    def __init__(self, backend, name, sheet_id):
+        self.backend = backend
+        self.name = name
+        self.id = sheet_id
+
+    def _values(self):
+        return self.backend.data[self.name]
+
+    @property
+    def row_count(self):
+        return len(self._values())
+
+    @property
+    def col_count(self):
+        return max(len(self._values()[0]), 26)
+
+    def get_all_records(self):
+        self.backend.call("get_all_records")
+        with self.backend.lock:
+            header, *rows = self._values()
+            return [dict(zip(header, row)) for row in rows]
+
+    def get_all_values(self):
+        self.backend.call("get_all_values")
+        with self.backend.lock:
+            return [[str(v) for v in row] for row in self._values()]
+
+    def get_values(self, range_name=None):
+        # Only the "A<row>:<col>" ranges read_rows() asks for
+        self.backend.call("get_values")
+        first = int(re.match(r"A(\d+)", range_name).group(1)) if range_name else 1
+        with self.backend.lock:
+            return [[str(v) for v in row] for row in self._values()[first - 1:]]
+
+    def row_values(self, row):
+        self.backend.call("row_values")
+        with self.backend.lock:
+            values = self._values()
+            return list(values[row - 1]) if row <= len(values) else []
+
+    def append_row(self, row, **kwargs):
+        self.backend.call("append_row")
+        with self.backend.lock:
+            self._values().append(list(row))
+
+    def append_rows(self, rows, **kwargs):
+        self.backend.call("append_rows")
+        with self.backend.lock:
+            self._values().extend(list(r) for r in rows)
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def worksheet(self, name):
+        self.backend.call("worksheet")
+        if name not in self.backend.data:
+            raise KeyError(name)
+        return FakeWorksheet(self.backend, name, list(self.backend.data).index(name))
+
+    def batch_update(self, body):
+        self.backend.call("batch_update")
+        names = list(self.backend.data)
+        with self.backend.lock:
+            for request in body.get("requests", []):
+                span = request["deleteDimension"]["range"]
+                del self.backend.data[names[span["sheetId"]]][span["startIndex"]:span["endIndex"]]
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def open(self, name):
+        self.backend.call("open")
+        return FakeSpreadsheet(self.backend)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def reset(**config):
+    global _client
+    with _client_lock:
+        _client = FakeClient(FakeBackend(**config))
+        return _client
+
+
+def get_fake_client():
+    with _client_lock:
+        if _client is not None:
+            return _client
+    return reset(
+        latency=float(os.environ.get("FAKE_SHEETS_LATENCY", "0.2")),
+        error_rate=float(os.environ.get("FAKE_SHEETS_429_RATE", "0")),
+        users=int(os.environ.get("FAKE_SHEETS_USERS", "50")),
+        days=int(os.environ.get("FAKE_SHEETS_DAYS", "60")),
+    )
@@ -0,0 +1,324 @@
+import streamlit as st
+import pandas as pd
+from datetime import date
+from functools import lru_cache
+
+# ================= OPTIONS =================
+FOLLOWUP_OPTIONS = ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th or more"]
+
+ASSOCIATION_OPTIONS = ["IMA", "IAP", "RMA", "MSBIRIA", "ISCP", "NON-IMA"]
+ASSOCIATION_PRODUCTS = ["PI", "HI", "Umbrella", "Other Products"]
+RETAIL_PRODUCTS = ["Health", "Life", "Motor", "Fire", "Misc"]
+CORPORATE_PRODUCTS = ["EB", "NON EB", "Retail"]
+
+SUB_PRODUCT_OPTIONS = {
+    "Health": ["Port", "New"],
+    "Life": ["Term", "Investment", "Traditional"],
+    "Motor": ["Car", "Bike", "Commercial Vehicle"],
+    "Fire": ["New"],
+    "Misc": ["New"],
+    "EB": ["GMC", "GPA", "GTL"],
+    "NON EB": ["DNO", "Liability", "WC", "Fire", "Marine"],
+    "Retail": ["Motor", "Fire", "Health"],
+}
+
+# ================= FIELD SCHEMA =================
+# type: select | text | number | date
+# rule: "required" (non-empty / valid date) or "positive" (> 0)
+def field(name, label, kind, options=None, rule=None, step=None):
+    return {"name": name, "label": label, "type": kind, "options": options, "rule": rule, "step": step}
+
+PRODUCT_RULE = "required"  # Common mandatory for all channels
+
+def product(options):
+    return field("product", "Product", "select", options, PRODUCT_RULE)
+
+# Options come from SUB_PRODUCT_OPTIONS[selected product]
+SUB_PRODUCT = field("sub_product", "Sub Product", "select", SUB_PRODUCT_OPTIONS)
+
+FOLLOWUPS = field("followups", "Follow-up Count", "select", FOLLOWUP_OPTIONS)
+
+def closure_date(rule="required"):
+    return field("closure_date", "Expected Closure Date", "date", rule=rule)
+
+CHANNEL_SCHEMAS = {
+    "Association": [
+        field("association", "Association", "select", ASSOCIATION_OPTIONS, "required"),
+        product(ASSOCIATION_PRODUCTS),
+        field("client_name", "Client Name", "text", rule="required"),
+        field("deal_id", "Deal ID", "text", rule="required"),
+        closure_date(),
+        field("commitment_nop", "Commitment NOP", "number", rule="positive", step=1),
+        field("deals_commitment", "Deals Commitment", "text"),
+        field("deals_created_product", "Deals Created Product", "select", ["Health", "Life", "Fire", "Motor", "Misc"]),
+        field("deal_assigned_to", "Deal Assigned To", "select", ["Satish", "Divya", "Ravi Raj", "Rasika", "Manisha"]),
+        FOLLOWUPS,
+    ],
+    # Renewal: client / deal / closure date are not required, so not shown
+    "Renewal": [
+        field("association", "Association", "select", ASSOCIATION_OPTIONS, "required"),
+        product(ASSOCIATION_PRODUCTS),
+        field("commitment_nop", "Renewal Commitment", "number", rule="positive", step=1),
+        field("deals_commitment", "Deals Commitment", "text", rule="required"),
+        field("deals_created_product", "Deals Created Product", "select",
+              ["Health", "Life", "Fire", "Motor", "Misc"], "required"),
+        field("deal_assigned_to", "Deal Assigned To", "select",
+              ["Satish", "Divya", "Ravi Raj", "Rasika", "Manisha"], "required"),
+        FOLLOWUPS,
+    ],
+    "Cross Sell": [
+        product(RETAIL_PRODUCTS),
+        SUB_PRODUCT,
+        field("client_name", "Client Name", "text", rule="required"),
+        field("deal_id", "Deal ID", "text", rule="required"),
+        field("expected_premium", "Expected Premium", "number", rule="positive"),
+        FOLLOWUPS,
+        closure_date(),
+    ],
+    "Affiliate": [
+        product(RETAIL_PRODUCTS),
+        SUB_PRODUCT,
+        field("meeting_count", "Meeting Count", "number", rule="positive", step=1),
+        field("expected_premium", "Expected Premium", "number", rule="positive"),
+        field("meeting_type", "Meeting Type", "select",
+              ["Visit Partner", "Partner Client", "Self Business"], "required"),
+        FOLLOWUPS,
+        closure_date(),
+    ],
+    "Affiliate Renewal": [
+        field("commitment_nop", "Renewal Commitment", "number", step=1),
+        field("client_name", "Client Name", "text"),
+        product(RETAIL_PRODUCTS),
+        SUB_PRODUCT,
+        field("expected_premium", "Expected Premium", "number"),
+        FOLLOWUPS,
+        closure_date(rule=None),
+    ],
+    "Corporate": [
+        field("client_name", "Client Name", "text", rule="required"),
+        field("client_mobile", "Client Mobile", "text", rule="required"),
+        field("case_type", "Case Type", "select", ["New", "Renewal"]),
+        product(CORPORATE_PRODUCTS),
+        SUB_PRODUCT,
+        field("meeting_count", "Meeting Count", "number", rule="positive", step=1),
+        field("meeting_type", "Meeting Type", "select",
+              ["With Kedar", "With Prathmesh", "Individual"], "required"),
+        field("expected_premium", "Expected Premium", "number", rule="positive"),
+        FOLLOWUPS,
+        closure_date(),
+    ],
+}
+
+TEXT_DEFAULT = ""
+NUMBER_DEFAULT = 0
+
+# ================= SHEET COLUMN MAPPING =================
+# daily_commitments column order. Entries not produced by a form field come
+# from the submit metadata (date, employee, channel, timestamp) or stay blank.
+SHEET_COLUMNS = [
+    "date", "empcode", "empname", "team", "channel", "association", "client_name",
+    "product", "sub_product", "expected_premium", "commitment_nop", "meeting_count",
+    "followups", "closure_date", "deal_id", "deals_commitment", "deals_created_product",
+    "deal_assigned_to", "case_type", "product_type", "meeting_type", "client_mobile",
+    "timestamp"
+]
+
+META_COLUMNS = ["date", "empcode", "empname", "team", "channel", "timestamp"]
+
+NUMBER_COLUMNS = ["expected_premium", "commitment_nop", "meeting_count"]
+DATE_COLUMNS = ["closure_date"]
+
+
+def channel_fields(channel):
+    return CHANNEL_SCHEMAS.get(channel, [])
+
+
+# ================= COMPILED VALIDATION =================
+@lru_cache(maxsize=None)
+def compile_rules(channel):
+    # Flatten the schema once into (column, check, message) triples
+    rules = []
+    for f in channel_fields(channel):
+        if f["rule"] == "required":
+            check = "date" if f["type"] == "date" else "required"
+            rules.append((f["name"], check, f"❌ {f['label']} is mandatory"))
+        elif f["rule"] == "positive":
+            rules.append((f["name"], "positive", f"❌ {f['label']} must be greater than 0"))
+
+        if f["name"] == "sub_product":
+            rules.append((f["name"], "sub_product", "❌ Sub Product is not valid for the selected Product"))
+        elif f["type"] == "select":
+            rules.append((f["name"], "option", f"❌ {f['label']} is not a valid option"))
+    return tuple(rules)
+
+
+def normalize(channel, df):
+    # Bring an entry frame (form values, grid or CSV) to the schema's types
+    out = pd.DataFrame(index=df.index)
+    for f in channel_fields(channel):
+        col = df[f["name"]] if f["name"] in df.columns else pd.Series(None, index=df.index, dtype="object")
+        if f["type"] == "number":
+            out[f["name"]] = pd.to_numeric(col, errors="coerce").fillna(NUMBER_DEFAULT)
+        elif f["type"] == "date":
+            out[f["name"]] = pd.to_datetime(col, errors="coerce")
+        else:
+            out[f["name"]] = col.fillna(TEXT_DEFAULT).astype(str).str.strip().replace("nan", TEXT_DEFAULT)
+    return out
+
+
+def validate_frame(channel, df):
+    # One vectorized pass over every rule; returns [(row position, message)]
+    failures = []
+    for name, check, message in compile_rules(channel):
+        col = df[name]
+        if check == "required":
+            bad = col.eq("")
+        elif check == "date":
+            bad = col.isna()
+        elif check == "positive":
+            bad = col <= 0
+        elif check == "sub_product":
+            pairs = {f"{p}|{s}" for p, subs in SUB_PRODUCT_OPTIONS.items() for s in subs}
+            product_col = df["product"] if "product" in df.columns else pd.Series("", index=df.index)
+            bad = col.ne("") & ~(product_col + "|" + col).isin(pairs)
+        else:
+            options = next(f["options"] for f in channel_fields(channel) if f["name"] == name)
+            bad = col.ne("") & ~col.isin(options)
+
+        for pos in bad.to_numpy().nonzero()[0]:
+            failures.append((int(pos), message))
+
+    failures.sort(key=lambda x: x[0])
+    return failures
+
+
+# ================= ROW SERIALIZATION =================
+def serialize_rows(channel, df, meta):
+    # Map a normalized entry frame onto the sheet's column order
+    out = pd.DataFrame(index=df.index)
+    for col in SHEET_COLUMNS:
+        if col in META_COLUMNS:
+            out[col] = meta[col] if col != "channel" else channel
+        elif col not in df.columns:
+            out[col] = date.today().strftime("%Y-%m-%d") if col in DATE_COLUMNS else (
+                NUMBER_DEFAULT if col in NUMBER_COLUMNS else TEXT_DEFAULT
+            )
+        elif col in NUMBER_COLUMNS:
+            nums = df[col].astype(float)
+            out[col] = nums.astype("int64").astype(object).where(nums % 1 == 0, nums.astype(object))
+        elif col in DATE_COLUMNS:
+            out[col] = df[col].dt.strftime("%Y-%m-%d").fillna(date.today().strftime("%Y-%m-%d"))
+        else:
+            out[col] = df[col]
+    return out.astype(object).values.tolist()
+
+
+# ================= IDEMPOTENCY KEYS =================
+# One key per submission: empcode + date + channel + deal_id + client_name.
+# Rows without a deal ID (Renewal, Affiliate, Corporate, Affiliate Renewal)
+# also hash the entry details and amounts, so two different commitments for
+# one client on one day stay apart and only exact repeats collapse.
+KEY_COLUMNS = ["empcode", "channel", "deal_id", "client_name"]
+DETAIL_TEXT_COLUMNS = [
+    "association", "product", "sub_product", "case_type", "meeting_type", "deals_commitment"
+]
+DETAIL_NUMERIC_COLUMNS = ["expected_premium", "commitment_nop", "nop", "meeting_count"]
+
+
+def submission_keys(df):
+    if df.empty:
+        return pd.Series([], dtype="uint64")
+
+    def text(col):
+        if col not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[col].fillna("").astype(str).str.strip().str.lower().replace("nan", "")
+
+    def number(col):
+        if col not in df.columns:
+            return pd.Series("0.0", index=df.index)
+        return pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float).astype(str)
+
+    if "date" in df.columns:
+        day = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d").fillna("")
+    else:
+        day = pd.Series("", index=df.index)
+
+    key = day
+    for col in KEY_COLUMNS:
+        key = key + "|" + text(col)
+
+    no_deal = text("deal_id") == ""
+    if no_deal.any():
+        detail = key
+        for col in DETAIL_TEXT_COLUMNS:
+            detail = detail + "|" + text(col)
+        for col in DETAIL_NUMERIC_COLUMNS:
+            detail = detail + "|" + number(col)
+        key = key.where(~no_deal, detail)
+
+    return pd.util.hash_pandas_object(key, index=False)
+
+
+def dedupe_submissions(df):
+    # Built once per load: drops repeated submissions and returns the key
+    # index that new submissions are checked against in O(1)
+    keys = submission_keys(df)
+    unique = df[~keys.duplicated().values].reset_index(drop=True)
+    return unique, frozenset(keys.tolist())
+
+
+# ================= WIDGETS =================
+def safe_selectbox(label, options, key, default):
+    if key not in st.session_state:
+        st.session_state[key] = default
+    return st.selectbox(label, options, key=key)
+
+
+def render_fields(channel, emp_code):
+    # Draw the channel's widgets in schema order and return their values
+    values = {}
+    for f in channel_fields(channel):
+        key = f"{emp_code}_{f['name']}"
+        if f["type"] == "select":
+            options = f["options"]
+            if f["name"] == "sub_product":
+                options = SUB_PRODUCT_OPTIONS.get(values.get("product"), ["New"])
+            values[f["name"]] = safe_selectbox(f["label"], options, key, options[0])
+        elif f["type"] == "text":
+            values[f["name"]] = st.text_input(f["label"], key=key)
+        elif f["type"] == "number":
+            if f["step"]:
+                values[f["name"]] = st.number_input(f["label"], min_value=0, step=f["step"], key=key)
+            else:
+                values[f["name"]] = st.number_input(f["label"], min_value=0, key=key)
+        elif f["type"] == "date":
+            values[f["name"]] = st.date_input(f["label"], key=key)
+    return values
+
+
+def grid_column_config(channel):
+    # Column config for the bulk entry grid
+    config = {}
+    for f in channel_fields(channel):
+        if f["type"] == "select":
+            options = f["options"]
+            if f["name"] == "sub_product":
+                options = []
+                for prod in next(p["options"] for p in channel_fields(channel) if p["name"] == "product"):
+                    options += [o for o in SUB_PRODUCT_OPTIONS.get(prod, []) if o not in options]
+            config[f["name"]] = st.column_config.SelectboxColumn(f["label"], options=options)
+        elif f["type"] == "number":
+            config[f["name"]] = st.column_config.NumberColumn(f["label"], min_value=0, step=1)
+        elif f["type"] == "date":
+            config[f["name"]] = st.column_config.DateColumn(f["label"])
+        else:
+            config[f["name"]] = st.column_config.TextColumn(f["label"])
+    return config
+
+
+def grid_template(channel):
+    return pd.DataFrame({
+        f["name"]: pd.Series(dtype="float" if f["type"] == "number" else "object")
+        for f in channel_fields(channel)
+    })
@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+# ================= ACHIEVEMENT FILE LAYOUT =================
+# daily_achievement column order, used when the sheet has no header yet
+ACHIEVEMENT_COLUMNS = [
+    "date", "empcode", "empname", "team", "channel", "deal_id", "client_name",
+    "actual_premium", "actual_nop", "deals_achieved"
+]
+
+AMOUNT_COLUMNS = ["actual_premium", "actual_nop", "deals_achieved"]
+TEXT_COLUMNS = ["empname", "team", "channel", "deal_id", "client_name"]
+PROFILE_COLUMNS = ["empname", "team", "channel"]  # filled from user_master when blank
+
+CHUNK_ROWS = 20000
+
+
+# ================= CHUNKED READERS =================
+# Each yields (chunk, fraction of the file read) so memory stays bounded by
+# the chunk size whatever the file size.
+def read_csv_chunks(file, chunksize=CHUNK_ROWS):
+    size = getattr(file, "size", None) or 0
+    reader = pd.read_csv(file, chunksize=chunksize, dtype=str, keep_default_na=False)
+    for chunk in reader:
+        done = min(file.tell() / size, 1.0) if size else 0.0
+        yield chunk, done
+
+
+def read_excel_chunks(file, chunksize=CHUNK_ROWS):
+    # openpyxl is optional; only Excel uploads need it
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        total = max((ws.max_row or 0) - 1, 1)
+        buf, read = [], 0
+        for row in rows:
+            buf.append(row[:len(header)])
+            if len(buf) == chunksize:
+                read += len(buf)
+                yield pd.DataFrame(buf, columns=header), min(read / total, 1.0)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header), 1.0
+    finally:
+        wb.close()
+
+
+def read_chunks(file, name, chunksize=CHUNK_ROWS):
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        return read_excel_chunks(file, chunksize)
+    return read_csv_chunks(file, chunksize)
+
+
+# ================= VALIDATION / TYPE CASTING =================
+def missing_columns(columns):
+    # date + empcode and at least one achievement amount are required
+    columns = {str(c).strip().lower() for c in columns}
+    missing = [c for c in ["date", "empcode"] if c not in columns]
+    if not columns.intersection(AMOUNT_COLUMNS):
+        missing.append(" / ".join(AMOUNT_COLUMNS))
+    return missing
+
+
+def prepare_chunk(chunk, users, first_row=2):
+    # One vectorized pass: cast every column, then flag bad rows.
+    # Returns (valid rows, [(file row number, message)])
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower())
+
+    def text(col):
+        if col not in chunk.columns:
+            return pd.Series("", index=chunk.index)
+        # Excel hands whole-number cells over as floats (101.0), codes and
+        # deal IDs included; they must match what the sheet and CSVs hold
+        values = chunk[col].fillna("").astype(str).str.strip().replace("nan", "")
+        return values.str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+
+    out = pd.DataFrame(index=chunk.index)
+    out["date"] = pd.to_datetime(text("date"), errors="coerce")
+    out["empcode"] = text("empcode")
+    for col in TEXT_COLUMNS:
+        out[col] = text(col)
+
+    problems = [
+        (out["date"].isna(), "❌ Date is missing or invalid"),
+        (~out["empcode"].isin(users["empcode"].astype(str)), "❌ Unknown employee code"),
+    ]
+    for col in AMOUNT_COLUMNS:
+        raw = text(col)
+        out[col] = pd.to_numeric(raw.where(raw != "", "0"), errors="coerce")
+        problems.append((out[col].isna(), f"❌ {col} is not a number"))
+        problems.append((out[col] < 0, f"❌ {col} cannot be negative"))
+    amounts = out[AMOUNT_COLUMNS].fillna(0)
+    problems.append(((amounts == 0).all(axis=1), "❌ No achievement amount"))
+
+    # Blank name / team / channel come from user_master
+    profile = users.assign(empcode=users["empcode"].astype(str)).drop_duplicates("empcode").set_index("empcode")
+    for col in PROFILE_COLUMNS:
+        if col in profile.columns:
+            out[col] = out[col].where(out[col] != "", out["empcode"].map(profile[col]).fillna(""))
+
+    bad = pd.Series(False, index=out.index)
+    errors = []
+    for mask, message in problems:
+        mask = mask.to_numpy()
+        bad |= mask
+        for pos in mask.nonzero()[0]:
+            errors.append((first_row + int(pos), message))
+
+    errors.sort(key=lambda x: x[0])
+    return out[~bad.to_numpy()], errors
+
+
+# ================= DEDUPE KEYS =================
+KEY_TEXT_COLUMNS = ["empcode", "deal_id", "client_name"]
+
+
+def achievement_keys(df):
+    # date + empcode + deal + client + amounts, so only exact repeats collapse
+    if df.empty:
+        return np.array([], dtype="uint64")
+
+    def text(col):
+        if col not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[col].fillna("").astype(str).str.strip().str.lower().replace("nan", "")
+
+    def number(col):
+        if col not in df.columns:
+            return pd.Series("0.0", index=df.index)
+        return pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float).astype(str)
+
+    key = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d").fillna("")
+    for col in KEY_TEXT_COLUMNS:
+        key = key + "|" + text(col)
+    for col in AMOUNT_COLUMNS:
+        key = key + "|" + number(col)
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def key_index(df):
+    # Sorted unique keys; np.isin against it is one vectorized lookup per chunk
+    return np.unique(achievement_keys(df))
+
+
+def unseen(keys, index):
+    return ~np.isin(keys, index)
+
+
+# ================= ROW SERIALIZATION =================
+def achievement_rows(df, header):
+    # Map prepared rows onto the sheet's own column order
+    header = header or ACHIEVEMENT_COLUMNS
+    out = pd.DataFrame(index=df.index)
+    for col in header:
+        name = str(col).strip().lower()
+        if name == "date":
+            out[col] = df["date"].dt.strftime("%Y-%m-%d")
+        elif name in AMOUNT_COLUMNS:
+            nums = df[name].astype(float)
+            out[col] = nums.astype("int64").astype(object).where(nums % 1 == 0, nums.astype(object))
+        elif name == "timestamp":
+            out[col] = datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S")
+        elif name in df.columns:
+            out[col] = df[name]
+        else:
+            out[col] = ""
+    return out.astype(object).values.tolist()
@@ -0,0 +1,197 @@
+# Morning-rush load test: N simulated sessions verify, render their dashboard
+# and submit one commitment at the same time, the way the minutes before the
+# cutoff look in production. Runs against the in-memory Sheets backend
+# (fake_sheets.py) with injected latency and 429s; no credentials needed.
+# Every session runs in its own process with its own copy of the seeded
+# backend, like a cold replica; replicas share sheet snapshots through
+# SHARED_CACHE_DIR the way a multi-replica deployment does.
+# Usage: python loadtest.py [--sessions 40] [--concurrency 20] [--latency 0.2]
+#                           [--error-rate 0.02] [--users 60] [--days 60]
+import argparse
+import contextlib
+import json
+import os
+import multiprocessing
+import sys
+import tempfile
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SETTLE_S = 30  # how long a session waits for its background write after submitting
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def at(q):
+        return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+    return {"n": len(values), "p50_s": at(0.50), "p95_s": at(0.95), "p99_s": at(0.99), "max_s": round(values[-1], 3)}
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start
+
+
+def fill_form(at, channel, code):
+    # Selects and dates keep their defaults
+    from forms import CHANNEL_SCHEMAS
+
+    for f in CHANNEL_SCHEMAS.get(channel, []):
+        key = f"{code}_{f['name']}"
+        if f["type"] == "text":
+            at.text_input(key=key).input(f"LT-{code}-{f['name']}")
+        elif f["type"] == "number":
+            at.number_input(key=key).set_value(1000)
+
+
+def appended_rows(backend, before, code):
+    # Commitment rows written for this empcode since the session started;
+    # Affiliate rows carry no free text, so the empcode is the only marker
+    from forms import SHEET_COLUMNS
+
+    column = SHEET_COLUMNS.index("empcode")
+    with backend.lock:
+        rows = backend.data["daily_commitments"][before:]
+    return sum(str(row[column]) == str(code) for row in rows)
+
+
+def run_session(code, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    result = {"empcode": code, "timings": {}, "submitted": False, "confirmed": False, "error": None}
+    try:
+        at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=timeout)
+        result["timings"]["login_page"] = timed_run(at)
+
+        at.text_input[0].input(str(code))
+        at.button[0].click()
+        result["timings"]["verify_dashboard"] = timed_run(at)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        if not at.session_state["verified"]:
+            messages = [e.value for e in at.error] + [w.value for w in at.warning]
+            raise RuntimeError("verify failed: " + "; ".join(messages))
+
+        fill_form(at, at.session_state["channel"], code)
+        result["timings"]["form_rerun"] = timed_run(at)
+
+        submit = [b for b in at.button if "Submit Commitment" in str(b.label)]
+        if not submit:
+            raise RuntimeError("no submit button rendered")
+        submit[0].click()
+        result["submitted"] = True
+        result["timings"]["submit"] = timed_run(at)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        result["confirmed"] = any("submitted successfully" in s.value for s in at.success)
+        result["pending"] = any("still saving" in i.value for i in at.info)
+        if not (result["confirmed"] or result["pending"]):
+            result["error"] = "; ".join(e.value for e in at.error) or "no confirmation shown"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["trace"] = traceback.format_exc(limit=3)
+    return result
+
+
+def session_process(code, config, timeout):
+    # Entry point of one session's process: a fresh backend, one session,
+    # then wait for the write that may still be running on the I/O pool
+    os.environ["SHEETS_BACKEND"] = "fake"
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+    import fake_sheets
+    # What app.py imports, loaded up front so the first rerun times the
+    # script rather than module loading
+    import analytics, archive, ingest, quality, sheets, wallboard  # noqa: F401
+
+    backend = fake_sheets.reset(**config).backend
+    with backend.lock:
+        before = len(backend.data["daily_commitments"])
+    # The app prints read errors; keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        result = run_session(code, timeout)
+        deadline = time.perf_counter() + SETTLE_S
+        while result["submitted"] and time.perf_counter() < deadline and not appended_rows(backend, before, code):
+            time.sleep(0.5)
+    result["persisted"] = appended_rows(backend, before, code) > 0
+    result["api_calls"] = dict(backend.calls)
+    result["api_429s"] = dict(backend.errors)
+    return result
+
+
+def load_test(sessions, concurrency, latency, error_rate, users, days, timeout):
+    os.environ.setdefault("COMMITMENT_CUTOFF", "23:59")  # keep the form open whatever the clock says
+    os.environ.setdefault("SHARED_CACHE_DIR", tempfile.mkdtemp(prefix="loadtest-cache-"))
+    sys.path.insert(0, APP_DIR)
+    import fake_sheets
+
+    config = {"latency": latency, "error_rate": error_rate, "users": users, "days": days}
+    # One session per User / Team Lead: the same person submitting twice would
+    # (correctly) be refused as a duplicate
+    people = fake_sheets.seed(users, days)["user_master"][1:]
+    codes = [p[0] for p in people if p[3] in ("User", "Team Lead")][:sessions]
+
+    start = time.perf_counter()
+    # spawn + one task per child: no session inherits another's state
+    pool = ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context("spawn"),
+                               max_tasks_per_child=1)
+    with pool:
+        results = list(pool.map(session_process, codes, [config] * len(codes), [timeout] * len(codes)))
+    wall = time.perf_counter() - start
+
+    attempted = [r for r in results if r["submitted"]]
+    api_calls, api_429s = Counter(), Counter()
+    for r in results:
+        api_calls.update(r["api_calls"])
+        api_429s.update(r["api_429s"])
+
+    timings = {}
+    for r in results:
+        for step, value in r["timings"].items():
+            timings.setdefault(step, []).append(value)
+    errors = [r for r in results if r["error"]]
+
+    return {
+        "config": {"sessions": len(codes), "concurrency": concurrency, "latency_s": latency,
+                   "error_rate": error_rate, "users": users, "days": days},
+        "wall_s": round(wall, 2),
+        "latency": {step: percentiles(values) for step, values in timings.items()},
+        "submissions": {
+            "attempted": len(attempted),
+            "confirmed": sum(r["confirmed"] for r in results),
+            "still_saving": sum(bool(r.get("pending")) for r in results),
+            "persisted": sum(r["persisted"] for r in attempted),
+            "dropped": sum(not r["persisted"] for r in attempted),
+        },
+        "session_errors": len(errors),
+        "error_samples": sorted({r["error"] for r in errors})[:5],
+        "api_calls": dict(api_calls),
+        "api_429s": dict(api_429s),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent login -> dashboard -> submit load test")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20, help="session processes in flight at once")
+    parser.add_argument("--latency", type=float, default=0.2, help="mean seconds per Sheets call")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of Sheets calls failing with 429")
+    parser.add_argument("--users", type=int, default=60, help="User accounts in the fake org")
+    parser.add_argument("--days", type=int, default=60, help="days of seeded history")
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest per-rerun timeout")
+    args = parser.parse_args()
+    report = load_test(args.sessions, args.concurrency, args.latency, args.error_rate,
+                       args.users, args.days, args.timeout)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
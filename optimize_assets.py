@@ -0,0 +1,30 @@
+# Writes compressed, resized WebP copies of assets/*.png to assets/optimized/.
+# Usage: python optimize_assets.py [max_width]
+import os
+import sys
+from PIL import Image
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+OUT_DIR = os.path.join(ASSETS_DIR, "optimized")
+MAX_WIDTH = 800
+QUALITY = 80
+
+
+def optimize(max_width=MAX_WIDTH):
+    os.makedirs(OUT_DIR, exist_ok=True)
+    for name in sorted(os.listdir(ASSETS_DIR)):
+        if not name.lower().endswith(".png"):
+            continue
+        src = os.path.join(ASSETS_DIR, name)
+        dst = os.path.join(OUT_DIR, os.path.splitext(name)[0] + ".webp")
+
+        img = Image.open(src)
+        if img.width > max_width:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        img.save(dst, "WEBP", quality=QUALITY, method=6)
+
+        print(f"{name}: {os.path.getsize(src) // 1024} KB -> {os.path.getsize(dst) // 1024} KB")
+
+
+if __name__ == "__main__":
+    optimize(int(sys.argv[1]) if len(sys.argv) > 1 else MAX_WIDTH)
@@ -0,0 +1,76 @@
+import pandas as pd
+
+# ================= DATA QUALITY =================
+# Checks run on the raw sheet values, before cleaning coerces bad numbers to
+# 0 and bad dates to NaT, so rows that would silently drop out of (or distort)
+# a KPI are reported instead.
+AMOUNT_COLUMNS = {
+    "daily_commitments": ["expected_premium", "commitment_nop", "meeting_count"],
+    "daily_achievement": ["actual_premium", "actual_nop", "deals_achieved"],
+}
+
+# Columns shown next to each issue so the row can be found in the sheet
+CONTEXT_COLUMNS = ["date", "empcode", "empname", "channel", "client_name", "deal_id"]
+
+REPORT_COLUMNS = ["sheet", "issue", "value"] + CONTEXT_COLUMNS
+
+
+def text(df, col):
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str).str.strip()
+
+
+def amount_checks(col, name):
+    # Sheets hand back numbers already typed; only the leftovers need parsing
+    if pd.api.types.is_numeric_dtype(col):
+        return [(col < 0, f"Negative {name}")]
+    value = pd.to_numeric(col, errors="coerce")
+    unparsed = value.isna() & col.notna()
+    unparsed[unparsed] = col[unparsed].astype(str).str.strip() != ""
+    return [(unparsed, f"Non-numeric {name}"), (value < 0, f"Negative {name}")]
+
+
+def quality_issues(df, sheet_name, users, known_channels):
+    # One row per (data row, failed check); empty frame when everything passes
+    if df.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    df = df.reset_index(drop=True)
+
+    checks = []
+    if "date" in df.columns:
+        checks.append((pd.to_datetime(df["date"], errors="coerce").isna(), "Unparseable date", "date"))
+
+    for col in AMOUNT_COLUMNS.get(sheet_name, []):
+        if col in df.columns:
+            checks += [(mask, issue, col) for mask, issue in amount_checks(df[col], col)]
+
+    if "empcode" in df.columns:
+        # Hash lookup against user_master's codes, done once per distinct code
+        known = pd.Index(users["empcode"].astype(str).str.strip().unique())
+        codes = pd.Series(df["empcode"].dropna().unique())
+        unknown = codes[known.get_indexer(codes.astype(str).str.strip()) < 0]
+        checks.append((df["empcode"].isin(unknown) | df["empcode"].isna(), "Unknown empcode", "empcode"))
+
+    if "channel" in df.columns:
+        checks.append((~df["channel"].isin(known_channels), "Unknown channel", "channel"))
+
+    found = []
+    for mask, issue, col in checks:
+        hit = pd.Series(mask, index=df.index).to_numpy()
+        if not hit.any():
+            continue
+        # Only flagged rows are turned into report text
+        rows = df[hit]
+        context = pd.DataFrame({c: text(rows, c) for c in CONTEXT_COLUMNS})
+        found.append(context.assign(sheet=sheet_name, issue=issue, value=text(rows, col)))
+
+    if not found:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    return pd.concat(found, ignore_index=True)[REPORT_COLUMNS]
+
+
+def issue_counts(report):
+    if report.empty:
+        return pd.DataFrame(columns=["sheet", "issue", "rows"])
+    return report.groupby(["sheet", "issue"]).size().reset_index(name="rows")
@@ -1,10 +1,28 @@
 import streamlit as st
-import gspread
 import pandas as pd
+import io
 import json
-from google.oauth2.service_account import Credentials
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+SHEETS_TIMEOUT = float(os.environ.get("SHEETS_TIMEOUT", "15"))  # seconds per call
+SHEETS_WORKERS = int(os.environ.get("SHEETS_WORKERS", "8"))
 
 def get_client():
+    # SHEETS_BACKEND=fake swaps in the in-memory backend used by loadtest.py
+    if os.environ.get("SHEETS_BACKEND") == "fake":
+        from fake_sheets import get_fake_client
+        return get_fake_client()
+
+    # gspread / google-auth are slow to import; only the session that
+    # actually talks to Google pays for them
+    import gspread
+    from google.oauth2.service_account import Credentials
+    from requests.adapters import HTTPAdapter
+
     creds_dict = st.secrets["gcp_service_account"]
 
     scope = [
@@ -13,7 +31,13 @@ def get_client():
     ]
 
     credentials = Credentials.from_service_account_info(creds_dict, scopes=scope)
-    return gspread.authorize(credentials)
+    gc = gspread.authorize(credentials)
+
+    # Keep-alive pool sized for the I/O workers, and no call waits forever
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=SHEETS_WORKERS)
+    gc.http_client.session.mount("https://", adapter)
+    gc.set_timeout(SHEETS_TIMEOUT)
+    return gc
 
 def read_sheet(sh, sheet_name):
     try:
@@ -22,8 +46,231 @@ def read_sheet(sh, sheet_name):
         return pd.DataFrame(data)
     except Exception as e:
         print(e)
-        return pd.DataFrame()
+        # Callers still get a frame; the reason travels with it
+        df = pd.DataFrame()
+        df.attrs["load_error"] = f"{type(e).__name__}: {e}"
+        return df
+
+def cell_value(value):
+    # gspread sends rows as JSON; numpy scalars (what pandas hands back for
+    # parsed numbers) become plain int / float / str first
+    return value.item() if hasattr(value, "item") and hasattr(value, "dtype") else value
 
 def append_row(sh, sheet_name, row):
     ws = sh.worksheet(sheet_name)
-    ws.append_row(row)
+    ws.append_row([cell_value(v) for v in row])
+
+def append_rows(sh, sheet_name, rows):
+    ws = sh.worksheet(sheet_name)
+    ws.append_rows([[cell_value(v) for v in row] for row in rows])
+
+def sheet_header(sh, sheet_name):
+    ws = sh.worksheet(sheet_name)
+    return ws.row_values(1)
+
+def read_rows(sh, sheet_name, first_row=1):
+    # Rows first_row (1 = header) to the end, typed like get_all_records.
+    # One ranged call, so reading the tail costs the tail, not the sheet.
+    from gspread.utils import numericise_all, rowcol_to_a1
+
+    ws = sh.worksheet(sheet_name)
+    if first_row > ws.row_count:
+        return []  # rows were deleted below the caller's cursor
+    last_col = rowcol_to_a1(1, ws.col_count).rstrip("0123456789")
+    return [numericise_all(row) for row in ws.get_values(f"A{first_row}:{last_col}")]
+
+# ================= SHARED CACHE =================
+# Replicas behind a load balancer share one copy of every sheet. Whoever
+# holds the refresh lock fetches from Google; everyone else reads the snapshot.
+class FileCacheBackend:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        # Write then rename so readers never see a half-written snapshot
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+        os.replace(tmp, self._path(key))
+
+    def acquire(self, key, ttl):
+        lock = self._path(key + ".lock")
+        try:
+            if time.time() - os.path.getmtime(lock) > ttl:
+                os.remove(lock)  # holder died mid-refresh
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def release(self, key):
+        try:
+            os.remove(self._path(key + ".lock"))
+        except FileNotFoundError:
+            pass
+
+
+class RedisCacheBackend:
+    # Any client with redis-py's get / set(nx, ex) / delete works, so tests can
+    # pass an in-memory stub
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value):
+        self.client.set(key, value)
+
+    def acquire(self, key, ttl):
+        return bool(self.client.set(key + ".lock", b"1", nx=True, ex=int(ttl)))
+
+    def release(self, key):
+        self.client.delete(key + ".lock")
+
+
+class SharedSheetCache:
+    def __init__(self, backend, interval=300, lock_ttl=120, wait=10):
+        self.backend = backend
+        self.interval = interval
+        self.lock_ttl = lock_ttl
+        self.wait = wait
+
+    # Snapshots are plain JSON (DataFrame.to_json "split"), never pickle:
+    # write access to the shared store must not mean code execution in
+    # every replica
+    def _load(self, sheet_name):
+        raw = self.backend.get(sheet_name)
+        if not raw:
+            return None
+        try:
+            entry = json.loads(raw)
+            data = pd.read_json(io.StringIO(entry["data"]), orient="split", dtype=False, convert_dates=False)
+        except (ValueError, KeyError, TypeError):
+            return None  # unreadable or from an older format; refetch
+        return {"fetched_at": entry["fetched_at"], "data": data}
+
+    def _store(self, sheet_name, data):
+        entry = {"fetched_at": time.time(), "data": data.to_json(orient="split", date_format="iso")}
+        self.backend.set(sheet_name, json.dumps(entry).encode())
+
+    def read(self, sheet_name, fetch):
+        entry = self._load(sheet_name)
+        if entry and time.time() - entry["fetched_at"] < self.interval:
+            return entry["data"]
+
+        if self.backend.acquire(sheet_name, self.lock_ttl):
+            try:
+                data = fetch()
+                if getattr(data, "empty", False):
+                    return data  # failed read; don't hand it to every replica
+                self._store(sheet_name, data)
+                return data
+            finally:
+                self.backend.release(sheet_name)
+
+        # Another replica is refreshing: serve the stale copy, or wait for the
+        # first one to land
+        if entry:
+            return entry["data"]
+        deadline = time.time() + self.wait
+        while time.time() < deadline:
+            time.sleep(0.5)
+            entry = self._load(sheet_name)
+            if entry:
+                return entry["data"]
+        return fetch()
+
+
+def get_shared_cache():
+    # SHARED_CACHE_URL=redis://... or SHARED_CACHE_DIR=/path; unset keeps the
+    # per-process cache only
+    interval = int(os.environ.get("SHARED_CACHE_INTERVAL", "300"))
+    url = os.environ.get("SHARED_CACHE_URL")
+    if url:
+        import redis
+        return SharedSheetCache(RedisCacheBackend(redis.Redis.from_url(url)), interval)
+    directory = os.environ.get("SHARED_CACHE_DIR")
+    if directory:
+        return SharedSheetCache(FileCacheBackend(directory), interval)
+    return None
+
+
+# ================= BACKGROUND I/O =================
+# Sheets calls run on a small shared pool so a slow API never freezes the
+# script thread. Reads of one sheet share a single in-flight request, and a
+# read that times out falls back to the last copy that loaded.
+class SheetTimeout(Exception):
+    pass
+
+
+class SheetsIO:
+    def __init__(self, workers=SHEETS_WORKERS, timeout=SHEETS_TIMEOUT):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sheets")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._snapshots = {}
+
+    def read_async(self, sheet_name, fetch):
+        with self._lock:
+            future = self._inflight.get(sheet_name)
+            started = future is None
+            if started:
+                future = self.executor.submit(fetch)
+                self._inflight[sheet_name] = future
+        if started:
+            future.add_done_callback(lambda f: self._finish(sheet_name, f))
+        return future
+
+    def _finish(self, sheet_name, future):
+        with self._lock:
+            if self._inflight.get(sheet_name) is future:
+                del self._inflight[sheet_name]
+            if future.exception() is None and not future.result().empty:
+                self._snapshots[sheet_name] = future.result()
+
+    def result(self, sheet_name, future):
+        # Callers may share one future, so each gets its own copy. A read that
+        # failed (read_sheet tags it with load_error) serves the last good copy
+        # too, still tagged, so the caller can warn without going blank.
+        try:
+            df = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                snapshot = self._snapshots.get(sheet_name)
+            if snapshot is None:
+                raise SheetTimeout(sheet_name)
+            return snapshot.copy()
+        if "load_error" in df.attrs:
+            with self._lock:
+                snapshot = self._snapshots.get(sheet_name)
+            if snapshot is not None:
+                stale = snapshot.copy()
+                stale.attrs["load_error"] = df.attrs["load_error"]
+                return stale
+        return df.copy()
+
+    def write(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def call(self, fn, *args):
+        # A one-off read on the pool: no sharing and no snapshot to fall back to
+        try:
+            return self.executor.submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise SheetTimeout(getattr(fn, "__name__", "call"))
@@ -0,0 +1,100 @@
+from datetime import date
+
+import pandas as pd
+
+import analytics
+
+TODAY = date(2026, 3, 18)
+
+
+def commitment(day, code, channel, premium, deal_id="", closure=None, followups="1st"):
+    return {
+        "date": pd.Timestamp(day), "empcode": str(code), "empname": f"User {code}", "team": "T1",
+        "channel": channel, "client_name": f"Client {code}", "deal_id": deal_id,
+        "expected_premium": premium, "commitment_nop": 0, "followups": followups,
+        "closure_date": pd.Timestamp(closure) if closure else pd.NaT,
+    }
+
+
+def achievement(day, code, deal_id, premium):
+    return {"date": pd.Timestamp(day), "empcode": str(code), "deal_id": deal_id,
+            "channel": "Cross Sell", "actual_premium": premium, "actual_nop": 0}
+
+
+def test_pipeline_includes_commitments_without_a_deal_id():
+    commitments = pd.DataFrame([
+        commitment("2026-03-02", 1, "Cross Sell", 5000, "D1", "2026-03-20"),
+        commitment("2026-03-03", 2, "Affiliate", 3000, "", "2026-03-10"),
+        commitment("2026-03-04", 3, "Corporate", 7000, "", "2026-04-15"),
+        commitment("2026-03-05", 4, "Affiliate", 9000, "", None),  # no closure date: not in the pipeline
+    ])
+    achievements = pd.DataFrame([achievement("2026-03-06", 1, "D1", 2000)])
+    rec = analytics.reconcile(commitments, achievements, TODAY)
+
+    pipe = analytics.build_pipeline(commitments, rec, analytics.stage_conversion(rec), TODAY)
+
+    by_code = pipe.set_index("empcode")
+    assert sorted(by_code.index) == ["1", "2", "3"]
+    assert by_code.loc["1", "remaining"] == 3000  # the deal join nets off what was achieved
+    assert by_code.loc["2", "bucket"] == "overdue"
+    assert by_code.loc["3", "bucket"] == "later"
+    assert by_code.loc["3", "remaining"] == 7000
+
+
+def test_pipeline_empty_without_dated_commitments():
+    commitments = pd.DataFrame([commitment("2026-03-05", 4, "Renewal", 0, "", None)])
+    rec = analytics.reconcile(commitments, pd.DataFrame(), TODAY)
+
+    pipe = analytics.build_pipeline(commitments, rec, analytics.stage_conversion(rec), TODAY)
+
+    assert pipe.empty
+    assert "bucket" in pipe.columns
+
+
+def test_reconcile_statuses():
+    commitments = pd.DataFrame([
+        commitment("2026-03-01", 1, "Cross Sell", 5000, "A", "2026-03-10"),  # fully achieved
+        commitment("2026-03-01", 2, "Cross Sell", 5000, "P", "2026-03-10"),  # partly achieved
+        commitment("2026-03-01", 3, "Cross Sell", 5000, "S", "2026-03-10"),  # overdue, nothing in
+        commitment("2026-03-01", 4, "Cross Sell", 5000, "O", "2026-03-25"),  # not due yet
+        commitment("2026-03-01", 5, "Affiliate", 5000, "", "2026-03-10"),    # no deal ID: not reconciled
+    ])
+    achievements = pd.DataFrame([
+        achievement("2026-03-05", 1, "A", 3000),
+        achievement("2026-03-08", 1, "A", 2000),
+        achievement("2026-03-06", 2, "P", 1000),
+        achievement("2026-03-06", 9, "O", 5000),  # same deal ID, other employee
+    ])
+
+    rec = analytics.reconcile(commitments, achievements, TODAY).set_index("deal_id")
+
+    assert rec["status"].to_dict() == {"A": "achieved", "P": "partial", "S": "slipped", "O": "open"}
+    assert rec.loc["A", "achieved"] == 5000
+    assert rec.loc["A", "lag_days"] == 4
+    assert analytics.status_counts(rec) == {"achieved": 1, "partial": 1, "slipped": 1, "open": 1}
+
+
+def test_reconcile_takes_value_and_closure_date_from_the_latest_follow_up():
+    commitments = pd.DataFrame([
+        commitment("2026-03-01", 1, "Cross Sell", 5000, "D1", "2026-03-05", "1st"),
+        commitment("2026-03-12", 1, "Cross Sell", 8000, "D1", "2026-03-30", "2nd"),
+    ])
+
+    rec = analytics.reconcile(commitments, pd.DataFrame(), TODAY)
+
+    assert len(rec) == 1
+    deal = rec.iloc[0]
+    assert (deal["committed"], deal["closure_date"], deal["followup_stage"]) == (8000, pd.Timestamp("2026-03-30"), 2)
+    assert deal["first_committed"] == pd.Timestamp("2026-03-01")
+    assert deal["status"] == "open"  # the first closure date passed, the current one has not
+
+
+def test_reconcile_nop_channels_compare_policy_counts():
+    commitments = pd.DataFrame([dict(commitment("2026-03-01", 1, "Association", 0, "N1", "2026-03-10"),
+                                     commitment_nop=3)])
+    achievements = pd.DataFrame([dict(achievement("2026-03-05", 1, "N1", 0), channel="Association", actual_nop=3)])
+
+    rec = analytics.reconcile(commitments, achievements, TODAY)
+
+    assert rec.iloc[0]["metric"] == "NOP"
+    assert rec.iloc[0]["status"] == "achieved"
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pandas as pd
+
+import archive
+import fake_sheets
+
+TODAY = date(2026, 3, 15)
+
+
+def live_sheet(rows):
+    # A fake spreadsheet whose daily_achievement holds just these rows
+    sh = fake_sheets.reset(latency=0, users=0, days=0).open(archive.SPREADSHEET)
+    header = sh.backend.data["daily_achievement"][0]
+    sh.backend.data["daily_achievement"] = [header] + [list(r) for r in rows]
+    return sh, header
+
+
+def achievement(day, code, premium=800):
+    return [day, code, f"User {code}", "T1", "Health", f"D{code}", f"Client {code}", premium, 1, 1]
+
+
+def test_row_ranges_bottom_first():
+    assert archive.row_ranges([2, 3, 4, 7, 9, 10]) == [(9, 10), (7, 7), (2, 4)]
+    assert archive.row_ranges([]) == []
+
+
+def test_cold_months_keeps_current_window():
+    df = pd.DataFrame({"Date": ["2026-01-31", "2026-02-01", "2026-03-01", "not a date"]})
+    months = archive.cold_months(df, TODAY, 1)
+    assert months.iloc[:2].tolist() == ["2026-01", "2026-02"]
+    assert months.iloc[2:].isna().all()
+    assert archive.cold_months(df, TODAY, 2).dropna().tolist() == ["2026-01"]
+
+
+def test_delete_rows_removes_exactly_those_rows():
+    rows = [achievement(f"2026-02-{d:02d}", 1000 + d) for d in range(1, 9)]
+    sh, header = live_sheet(rows)
+    ws = sh.worksheet("daily_achievement")
+
+    archive.delete_rows(sh, ws, [2, 3, 5, 8, 9])  # sheet rows; row 1 is the header
+
+    assert sh.backend.data["daily_achievement"] == [header, rows[2], rows[4], rows[5]]
+
+
+def test_archive_sheet_moves_cold_rows_and_keeps_identical_ones(tmp_path):
+    # Two identical February rows are two achievements, not one
+    twin = achievement("2026-02-10", 1001)
+    rows = [
+        achievement("2026-01-20", 1000), twin, achievement("2026-03-02", 1002),
+        list(twin), achievement("2026-03-05", 1003), achievement("2026-02-28", 1004),
+    ]
+    sh, header = live_sheet(rows)
+
+    moved = archive.archive_sheet(sh, "daily_achievement", TODAY, apply=True, directory=str(tmp_path))
+
+    assert moved == 4
+    assert sh.backend.data["daily_achievement"] == [header, rows[2], rows[4]]
+    february = archive.read_partition(archive.partition_path(str(tmp_path), "daily_achievement", "2026-02"))
+    assert len(february) == 3
+    assert (february["deal_id"] == "D1001").sum() == 2
+
+
+def test_rerun_after_failed_delete_does_not_double_rows(tmp_path):
+    twin = achievement("2026-02-10", 1001)
+    rows = [twin, list(twin), achievement("2026-02-11", 1002)]
+    sh, _ = live_sheet(rows)
+    ws = sh.worksheet("daily_achievement")
+    df = archive.sheet_frame(ws)
+    path = archive.partition_path(str(tmp_path), "daily_achievement", "2026-02")
+
+    archive.write_partition(path, df)
+    archive.write_partition(path, df)  # the delete never happened
+    assert len(archive.read_partition(path)) == 3
+
+    # A third identical row appended later is a new copy and is kept
+    archive.write_partition(path, pd.concat([df, df.iloc[[0]]]))
+    assert len(archive.read_partition(path)) == 4
+    assert archive.verify_partition(path, df)
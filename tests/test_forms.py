@@ -0,0 +1,73 @@
+import pandas as pd
+
+from forms import SHEET_COLUMNS, submission_keys, dedupe_submissions
+
+
+def row(**values):
+    out = dict.fromkeys(SHEET_COLUMNS, "")
+    out.update(date="2026-03-02", empcode="1001", channel="Cross Sell", timestamp="2026-03-02 10:00:00")
+    out.update(values)
+    return out
+
+
+def keys(*rows):
+    return submission_keys(pd.DataFrame(rows, columns=SHEET_COLUMNS)).tolist()
+
+
+def test_same_deal_same_day_collapses_whatever_the_amount():
+    first = row(deal_id="D1", client_name="Acme", expected_premium=5000)
+    again = row(deal_id="D1", client_name="Acme", expected_premium=6000, timestamp="2026-03-02 11:00:00")
+    assert keys(first)[0] == keys(again)[0]
+
+
+def test_key_ignores_case_and_padding():
+    assert keys(row(deal_id="D1", client_name="Acme"))[0] == keys(row(deal_id=" d1 ", client_name="ACME "))[0]
+
+
+def test_key_depends_on_day_employee_and_deal():
+    base = row(deal_id="D1", client_name="Acme")
+    others = [
+        row(deal_id="D1", client_name="Acme", date="2026-03-03"),
+        row(deal_id="D1", client_name="Acme", empcode="1002"),
+        row(deal_id="D2", client_name="Acme"),
+    ]
+    assert len(set(keys(base, *others))) == 4
+
+
+def test_rows_without_a_deal_id_are_told_apart_by_details_and_amounts():
+    # Affiliate: no deal ID, no client name
+    affiliate = dict(channel="Affiliate", product="Health", sub_product="New", meeting_type="Visit Partner")
+    base = row(**affiliate, expected_premium=5000, meeting_count=1)
+    others = [
+        row(**affiliate, expected_premium=7000, meeting_count=1),
+        row(**affiliate, expected_premium=5000, meeting_count=2),
+        row(**dict(affiliate, sub_product="Port"), expected_premium=5000, meeting_count=1),
+    ]
+    assert len(set(keys(base, *others))) == 4
+    # an exact repeat still collapses, even with a later timestamp
+    assert keys(base)[0] == keys(dict(base, timestamp="2026-03-02 12:00:00"))[0]
+
+
+def test_corporate_case_type_is_part_of_the_key():
+    corporate = dict(channel="Corporate", client_name="Acme", product="EB", sub_product="GMC", expected_premium=1)
+    assert len(set(keys(row(**corporate, case_type="New"), row(**corporate, case_type="Renewal")))) == 2
+
+
+def test_numeric_amounts_match_their_text_form():
+    # serialize_rows sends numbers, the sheet reads back text
+    affiliate = dict(channel="Affiliate", product="Health")
+    assert keys(row(**affiliate, expected_premium=5000))[0] == keys(row(**affiliate, expected_premium="5000"))[0]
+
+
+def test_dedupe_keeps_the_first_submission_and_indexes_all_keys():
+    rows = [row(deal_id="D1", client_name="Acme", expected_premium=5000),
+            row(deal_id="D1", client_name="Acme", expected_premium=6000),
+            row(deal_id="D2", client_name="Acme")]
+    unique, index = dedupe_submissions(pd.DataFrame(rows, columns=SHEET_COLUMNS))
+
+    assert unique["expected_premium"].tolist() == [5000, ""]
+    assert index == set(keys(*rows))
+
+
+def test_empty_frame_has_no_keys():
+    assert submission_keys(pd.DataFrame(columns=SHEET_COLUMNS)).empty
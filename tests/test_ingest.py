@@ -0,0 +1,32 @@
+import pandas as pd
+
+import ingest
+
+USERS = pd.DataFrame({"empcode": ["101"], "empname": ["A"], "team": ["T1"], "channel": ["Cross Sell"]})
+
+
+def test_excel_float_codes_match_csv_text():
+    # Excel hands whole-number cells over as floats
+    excel = pd.DataFrame({"date": ["2026-03-01"], "empcode": [101.0], "deal_id": [12345.0],
+                          "client_name": ["Flat 4.0"], "actual_premium": [1500.0]})
+    csv = pd.DataFrame({"date": ["2026-03-01"], "empcode": ["101"], "deal_id": ["12345"],
+                        "client_name": ["Flat 4.0"], "actual_premium": ["1500"]})
+
+    from_excel, errors = ingest.prepare_chunk(excel, USERS)
+    from_csv, _ = ingest.prepare_chunk(csv, USERS)
+
+    assert errors == []
+    assert from_excel.iloc[0]["empcode"] == "101"
+    assert from_excel.iloc[0]["deal_id"] == "12345"
+    assert from_excel.iloc[0]["client_name"] == "Flat 4.0"
+    assert (ingest.achievement_keys(from_excel) == ingest.achievement_keys(from_csv)).all()
+
+
+def test_bad_rows_are_reported_by_file_row():
+    chunk = pd.DataFrame({"date": ["2026-03-01", "bad", "2026-03-01"], "empcode": ["101", "101", "999"],
+                          "actual_premium": ["100", "100", "100"]})
+
+    valid, errors = ingest.prepare_chunk(chunk, USERS, first_row=2)
+
+    assert len(valid) == 1
+    assert errors == [(3, "❌ Date is missing or invalid"), (4, "❌ Unknown employee code")]
@@ -0,0 +1,158 @@
+import threading
+
+import pandas as pd
+import pytest
+
+import sheets
+
+
+def failed_read(error="APIError: [429]: Quota exceeded"):
+    df = pd.DataFrame()
+    df.attrs["load_error"] = error
+    return df
+
+
+def test_failed_read_serves_the_last_good_copy():
+    io = sheets.SheetsIO(workers=1, timeout=5)
+    good = pd.DataFrame({"empcode": ["1001"]})
+    assert io.result("user_master", io.read_async("user_master", lambda: good)).equals(good)
+
+    stale = io.result("user_master", io.read_async("user_master", failed_read))
+
+    assert stale.equals(good)
+    assert stale.attrs["load_error"].startswith("APIError")
+    # the fallback is a copy: the snapshot itself stays untagged
+    assert "load_error" not in io.result("user_master", io.read_async("user_master", lambda: good)).attrs
+
+
+def test_failed_read_without_a_snapshot_is_returned_as_is():
+    io = sheets.SheetsIO(workers=1, timeout=5)
+
+    df = io.result("user_master", io.read_async("user_master", failed_read))
+
+    assert df.empty
+    assert "load_error" in df.attrs
+
+
+def test_slow_read_without_a_snapshot_times_out():
+    io = sheets.SheetsIO(workers=1, timeout=0.05)
+    release = threading.Event()
+
+    with pytest.raises(sheets.SheetTimeout):
+        io.result("user_master", io.read_async("user_master", lambda: release.wait(5) and pd.DataFrame()))
+    release.set()
+
+
+# ================= SHARED CACHE =================
+SHEET = pd.DataFrame({"empcode": [1001, 1002], "team": ["T1", "T2"]})
+
+
+class Fetch:
+    def __init__(self, data=SHEET):
+        self.data = data
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.data
+
+
+def shared(tmp_path, **options):
+    return sheets.SharedSheetCache(sheets.FileCacheBackend(str(tmp_path)), **options)
+
+
+def test_fresh_snapshot_is_served_without_fetching(tmp_path):
+    cache = shared(tmp_path)
+    first = Fetch()
+    assert cache.read("user_master", first).equals(SHEET)
+
+    again = Fetch()
+    assert cache.read("user_master", again).equals(SHEET)
+    assert (first.calls, again.calls) == (1, 0)
+
+
+def test_stale_snapshot_is_refreshed_by_the_lock_holder(tmp_path):
+    cache = shared(tmp_path, interval=0)
+    cache.read("user_master", Fetch())
+
+    newer = SHEET.assign(team="T9")
+    fetch = Fetch(newer)
+    assert cache.read("user_master", fetch).equals(newer)
+    assert fetch.calls == 1
+    assert not tmp_path.joinpath("user_master.lock").exists()
+
+
+def test_stale_snapshot_is_served_while_another_replica_refreshes(tmp_path):
+    cache = shared(tmp_path, interval=0)
+    cache.read("user_master", Fetch())
+    assert cache.backend.acquire("user_master", 60)  # another replica holds the lock
+
+    fetch = Fetch(SHEET.assign(team="T9"))
+    assert cache.read("user_master", fetch).equals(SHEET)
+    assert fetch.calls == 0
+
+
+def test_without_a_snapshot_a_waiting_replica_fetches_itself(tmp_path):
+    cache = shared(tmp_path, wait=0.6)
+    assert cache.backend.acquire("user_master", 60)
+
+    fetch = Fetch()
+    assert cache.read("user_master", fetch).equals(SHEET)
+    assert fetch.calls == 1
+
+
+def test_dead_lock_holder_is_taken_over_after_the_ttl(tmp_path):
+    backend = sheets.FileCacheBackend(str(tmp_path))
+    assert backend.acquire("user_master", 60)
+    assert not backend.acquire("user_master", 60)
+    assert backend.acquire("user_master", 0)
+
+
+def test_failed_read_is_not_shared(tmp_path):
+    cache = shared(tmp_path)
+    assert cache.read("user_master", Fetch(pd.DataFrame())).empty
+
+    fetch = Fetch()
+    assert cache.read("user_master", fetch).equals(SHEET)
+    assert fetch.calls == 1
+
+
+def test_unreadable_snapshot_is_refetched(tmp_path):
+    cache = shared(tmp_path)
+    cache.backend.set("user_master", b"\x80\x04not json")
+
+    fetch = Fetch()
+    assert cache.read("user_master", fetch).equals(SHEET)
+    assert fetch.calls == 1
+
+
+class FakeRedis:
+    # The redis-py calls RedisCacheBackend makes, without expiry
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def test_redis_backend_shares_snapshots_and_the_lock():
+    client = FakeRedis()
+    one = sheets.SharedSheetCache(sheets.RedisCacheBackend(client), interval=0)
+    two = sheets.SharedSheetCache(sheets.RedisCacheBackend(client), interval=0)
+    one.read("user_master", Fetch())
+
+    assert two.backend.acquire("user_master", 60)
+    fetch = Fetch(SHEET.assign(team="T9"))
+    assert one.read("user_master", fetch).equals(SHEET)  # two holds the lock: stale copy
+    assert fetch.calls == 0
+    two.backend.release("user_master")
+    assert one.read("user_master", fetch)["team"].tolist() == ["T9", "T9"]
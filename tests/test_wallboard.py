@@ -0,0 +1,75 @@
+from datetime import date
+
+import fake_sheets
+from wallboard import KpiBoard
+
+TODAY = date(2026, 3, 18)
+
+
+def sheet_rows():
+    # Raw values of a fake daily_achievement sheet, header first
+    sh = fake_sheets.reset(latency=0, users=3, days=2).open("Sales_Commitment_Tracker")
+    return sh.backend.data["daily_achievement"]
+
+
+def tail(board, rows, sheet_name="daily_achievement"):
+    # What a ranged read from tail_start() to the end of the sheet returns
+    return board.take_tail(sheet_name, rows[board.tail_start(sheet_name) - 1:])
+
+
+def test_first_read_takes_the_header_and_all_rows():
+    rows = sheet_rows()
+    board = KpiBoard(TODAY)
+    assert board.tail_start("daily_achievement") == 1
+
+    df = tail(board, rows)
+    assert list(df.columns) == [str(h).strip().lower() for h in rows[0]]
+    assert len(df) == len(rows) - 1
+    assert board.tail_start("daily_achievement") == len(rows)
+
+
+def test_later_reads_return_only_appended_rows():
+    rows = sheet_rows()
+    board = KpiBoard(TODAY)
+    tail(board, rows)
+    assert tail(board, rows).empty
+
+    appended = [list(rows[-1]), list(rows[1])]
+    rows = rows + appended
+    df = tail(board, rows)
+    assert df.values.tolist() == appended
+    assert board.tail_start("daily_achievement") == len(rows)
+
+
+def test_short_rows_are_padded_to_the_header():
+    board = KpiBoard(TODAY)
+    df = board.take_tail("daily_achievement", [["Date", "Empcode", "Premium"], ["2026-03-18", "1001"]])
+    assert df.values.tolist() == [["2026-03-18", "1001", ""]]
+
+
+def test_changed_anchor_asks_for_a_rebuild():
+    rows = sheet_rows()
+    board = KpiBoard(TODAY)
+    tail(board, rows)
+
+    edited = [list(r) for r in rows]
+    edited[-1][-1] = "edited"
+    assert tail(board, edited) is None
+
+    trimmed = [rows[0]] + rows[3:]  # rows above the anchor deleted
+    assert tail(board, trimmed) is None
+
+
+def test_missing_anchor_asks_for_a_rebuild():
+    board = KpiBoard(TODAY)
+    board.take_tail("daily_achievement", [["Date", "Empcode"], ["2026-03-18", "1001"]])
+    assert board.take_tail("daily_achievement", []) is None
+
+
+def test_cursors_are_kept_per_sheet():
+    board = KpiBoard(TODAY)
+    board.take_tail("daily_achievement", [["Date"], ["2026-03-17"], ["2026-03-18"]])
+    assert board.tail_start("daily_achievement") == 3
+    assert board.tail_start("daily_commitments") == 1
+    assert board.take_tail("daily_commitments", []).empty
+    assert board.tail_start("daily_commitments") == 1
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pandas as pd
+
+from analytics import fact_rows, MEASURES
+
+# ================= WALLBOARD ACCUMULATORS =================
+# Per-day team and channel totals for the TV display (?view=wallboard), kept
+# current by feeding only the rows appended since the last tick. Each tail
+# read starts at the last applied row; that row has to come back unchanged,
+# otherwise rows above it were deleted or edited (archive.py, a manual
+# cleanup) and the board is rebuilt from the full sheet.
+WALLBOARD_SCOPES = {"team": "Team", "channel": "Channel"}
+
+CARD_WINDOWS = ["today", "yesterday", "week", "mtd"]
+
+TOTALS_INDEX = ["scope", "value", "metric", "date"]
+
+
+def card_windows(today):
+    # (start, end) of each card, the same periods the dashboard's KPI cards use
+    today = pd.Timestamp(today).normalize()
+    yesterday = today - pd.Timedelta(days=1)
+    return {
+        "today": (today, today),
+        "yesterday": (yesterday, yesterday),
+        "week": (today - pd.Timedelta(days=today.weekday()), today),
+        "mtd": (today.replace(day=1), today),
+    }
+
+
+def empty_totals():
+    index = pd.MultiIndex.from_tuples([], names=TOTALS_INDEX)
+    return pd.DataFrame({m: pd.Series(dtype="float64") for m in MEASURES}, index=index)
+
+
+class KpiBoard:
+    def __init__(self, today):
+        self.day = pd.Timestamp(today).normalize()
+        # Oldest day any card needs; older rows are skipped when applied
+        self.since = min(start for start, _ in card_windows(today).values())
+        self.lock = threading.Lock()
+        self.totals = empty_totals()
+        self.cursors = {}
+        self.keys = set()
+        self.rows_applied = 0
+        self.updated_at = 0.0
+
+    # ---------- ROW CURSORS ----------
+    def tail_start(self, sheet_name):
+        # Sheet row the next read starts at: the last applied row, re-read as
+        # an anchor (row 1, the header, before anything was applied)
+        cursor = self.cursors.get(sheet_name)
+        return cursor["row"] if cursor else 1
+
+    def take_tail(self, sheet_name, values):
+        # values: sheet rows from tail_start() on. Returns the rows not seen
+        # yet as a frame, or None when the anchor row no longer matches
+        cursor = self.cursors.get(sheet_name)
+        if cursor is None:
+            if not values:
+                return pd.DataFrame()
+            header = [str(h).strip().lower() for h in values[0]]
+        else:
+            header = cursor["header"]
+
+        width = len(header)
+        values = [list(r[:width]) + [""] * (width - len(r)) for r in values]
+        if cursor is not None and (not values or values[0] != cursor["last"]):
+            return None
+
+        start = self.tail_start(sheet_name)
+        self.cursors[sheet_name] = {"header": header, "row": start + len(values) - 1, "last": values[-1]}
+        return pd.DataFrame(values[1:], columns=header)
+
+    # ---------- ACCUMULATION ----------
+    def apply(self, commitments, achievements, commitment_keys=None):
+        # Adds cleaned, metric-tagged rows to the running totals. Repeated
+        # submissions are dropped the way the fact store drops them, by key
+        # (a Series on the commitments' index).
+        commitments = self._in_window(commitments)
+        achievements = self._in_window(achievements)
+        if commitment_keys is not None and not commitments.empty:
+            keys = commitment_keys.loc[commitments.index]
+            fresh = ~keys.duplicated() & ~keys.isin(self.keys)
+            self.keys.update(keys[fresh].tolist())
+            commitments = commitments[fresh.to_numpy()]
+
+        facts = fact_rows(commitments, achievements)
+        if not facts.empty:
+            parts = []
+            for scope in WALLBOARD_SCOPES:
+                daily = facts.groupby([scope, "metric", "date"])[MEASURES].sum()
+                daily.index = pd.MultiIndex.from_tuples(
+                    [(scope,) + key for key in daily.index], names=TOTALS_INDEX
+                )
+                parts.append(daily)
+            with self.lock:
+                self.totals = self.totals.add(pd.concat(parts), fill_value=0)
+        self.rows_applied += len(commitments) + len(achievements)
+        self.updated_at = time.time()
+
+    def _in_window(self, df):
+        if df.empty or "date" not in df.columns:
+            return df.iloc[0:0]
+        return df[df["date"] >= self.since]
+
+    # ---------- READ SIDE ----------
+    def summary(self, scope):
+        # One row per scope value and metric: commitment / achievement /
+        # meetings for every card window, plus achievement %
+        with self.lock:
+            totals = self.totals
+        if scope not in totals.index.get_level_values("scope"):
+            return pd.DataFrame()
+        totals = totals.xs(scope, level="scope")
+        dates = totals.index.get_level_values("date")
+
+        windows = {}
+        for name, (start, end) in card_windows(self.day).items():
+            part = totals[(dates >= start) & (dates <= end)]
+            windows[name] = part.groupby(level=["value", "metric"]).sum()
+        table = pd.concat(windows, axis=1).fillna(0)
+        table.columns = [f"{window}_{measure}" for window, measure in table.columns]
+        for window in CARD_WINDOWS:
+            committed = table[f"{window}_commitment"].where(table[f"{window}_commitment"] != 0)
+            table[f"{window}_%"] = (table[f"{window}_achievement"] / committed * 100).round(1).fillna(0)
+        return table.reset_index()